@@ -0,0 +1,224 @@
+"""
+Time-to-Collision Alert Engine
+Vectorized proximity/TTC evaluation run directly after the tracker update
+"""
+
+import json
+import socket
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from enum import IntEnum
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from object_tracker import TrackedObject
+
+class AlertLevel(IntEnum):
+    NONE = 0
+    WARNING = 1
+    CRITICAL = 2
+
+@dataclass
+class Alert:
+    track_id: str
+    class_name: str
+    level: AlertLevel
+    distance: float  # meters
+    ttc: float  # seconds, inf when not closing
+    capture_time: float  # perf_counter timestamp of the source frame
+    emit_time: float  # perf_counter timestamp when dispatched
+    lost: bool = False  # track dropped while alerting; level is NONE
+
+    @property
+    def latency(self) -> float:
+        """Seconds from frame capture to alert dispatch"""
+        return self.emit_time - self.capture_time
+
+class UdpAlertSink:
+    """Fire-and-forget JSON datagrams; never blocks the processing thread"""
+
+    def __init__(self, address: Tuple[str, int]):
+        self.address = address
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.dropped = 0
+
+    def __call__(self, alert: Alert):
+        payload = asdict(alert)
+        payload['level'] = alert.level.name
+        payload['ttc'] = None if np.isinf(alert.ttc) else alert.ttc
+        try:
+            self.sock.sendto(json.dumps(payload).encode(), self.address)
+        except (BlockingIOError, OSError):
+            self.dropped += 1
+
+    def close(self):
+        self.sock.close()
+
+class AlertEngine:
+    """Debounced distance/TTC alerts for all tracks of a frame"""
+
+    def __init__(self):
+        self.config = Config()
+        self.callbacks: List[Callable[[Alert], None]] = []
+
+        # Per-track state: last distance, timestamp and smoothed closing speed (m/s)
+        self._history: Dict[str, Tuple[float, float, float]] = {}
+        # Per-track debounce state: active level, candidate level, streak length
+        self._active: Dict[str, AlertLevel] = {}
+        self._candidate: Dict[str, Tuple[AlertLevel, int]] = {}
+        # Class and last distance of tracks with an active level, for clears on loss
+        self._last_seen: Dict[str, Tuple[str, float]] = {}
+
+        # Recent capture-to-dispatch latencies (seconds)
+        self.latencies = deque(maxlen=1000)
+
+    def add_callback(self, callback: Callable[[Alert], None]):
+        """Register a consumer for alert level changes"""
+        self.callbacks.append(callback)
+
+    def active_level(self, track_id: str) -> AlertLevel:
+        """Current debounced alert level of a track"""
+        return self._active.get(track_id, AlertLevel.NONE)
+
+    def max_active_level(self) -> AlertLevel:
+        """Highest debounced alert level across all tracks"""
+        return max(self._active.values(), default=AlertLevel.NONE)
+
+    def compute_ttc(self, tracked_objects: List[TrackedObject],
+                    timestamp: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Distances and time-to-collision (seconds) for all tracks"""
+        n = len(tracked_objects)
+        distances = np.array([obj.distance for obj in tracked_objects], dtype=np.float64)
+        states = np.array([obj.kalman_filter.kalman.statePost.ravel()
+                           for obj in tracked_objects], dtype=np.float64).reshape(n, 8)
+
+        previous = [self._history.get(obj.id) for obj in tracked_objects]
+        prev_distance = np.array([p[0] if p else np.nan for p in previous])
+        prev_time = np.array([p[1] if p else np.nan for p in previous])
+        prev_rate = np.array([p[2] if p else np.nan for p in previous])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dt = timestamp - prev_time
+            dt = np.where(dt > 0, dt, np.nan)
+
+            # Closing speed from distance history, smoothed against estimator noise
+            rate = (prev_distance - distances) / dt
+            rate = np.where(np.isnan(prev_rate), rate, 0.7 * prev_rate + 0.3 * rate)
+            ttc_distance = np.where(rate > 1e-3, distances / rate, np.inf)
+
+            # Looming from Kalman box-height velocity (pixels/frame, one frame per dt)
+            height = states[:, 3]
+            height_rate = states[:, 7]
+            ttc_looming = np.where(height_rate > 1e-3, height / height_rate * dt, np.inf)
+
+        ttc = np.fmin(ttc_distance, ttc_looming)
+        ttc = np.where(np.isnan(ttc), np.inf, ttc)
+
+        self._history = {
+            obj.id: (distances[i], timestamp, rate[i])
+            for i, obj in enumerate(tracked_objects)
+        }
+        return distances, ttc
+
+    def process(self, tracked_objects: List[TrackedObject],
+                capture_time: float) -> List[Alert]:
+        """Evaluate all tracks and dispatch debounced level changes
+
+        A track that disappears while alerting gets a final NONE alert with
+        lost set, so consumers never keep a stale CRITICAL.
+        """
+        if not tracked_objects:
+            alerts = self._lost_alerts(set(), capture_time)
+            self._candidate.clear()
+            self._history.clear()
+            self._dispatch(alerts)
+            return alerts
+
+        distances, ttc = self.compute_ttc(tracked_objects, capture_time)
+
+        critical = ((distances < self.config.CRITICAL_DISTANCE)
+                    | (ttc < self.config.ALERT_TTC_CRITICAL))
+        warning = ((distances < self.config.WARNING_DISTANCE)
+                   | (ttc < self.config.ALERT_TTC_WARNING))
+        levels = np.where(critical, AlertLevel.CRITICAL,
+                          np.where(warning, AlertLevel.WARNING, AlertLevel.NONE))
+
+        alerts = []
+        live_ids = set()
+        for i, obj in enumerate(tracked_objects):
+            live_ids.add(obj.id)
+            level = self._debounce(obj.id, AlertLevel(int(levels[i])))
+            if obj.id in self._active:
+                self._last_seen[obj.id] = (obj.class_name, float(distances[i]))
+            if level is None:
+                continue
+            alerts.append(Alert(
+                track_id=obj.id,
+                class_name=obj.class_name,
+                level=level,
+                distance=float(distances[i]),
+                ttc=float(ttc[i]),
+                capture_time=capture_time,
+                emit_time=0.0
+            ))
+
+        alerts += self._lost_alerts(live_ids, capture_time)
+        for track_id in [tid for tid in self._candidate if tid not in live_ids]:
+            del self._candidate[track_id]
+
+        self._dispatch(alerts)
+        return alerts
+
+    def _lost_alerts(self, live_ids: set, capture_time: float) -> List[Alert]:
+        """Clear alerts for active tracks that are no longer reported"""
+        alerts = []
+        for track_id in [tid for tid in self._active if tid not in live_ids]:
+            del self._active[track_id]
+            class_name, distance = self._last_seen.pop(track_id, ("", float('inf')))
+            alerts.append(Alert(
+                track_id=track_id,
+                class_name=class_name,
+                level=AlertLevel.NONE,
+                distance=distance,
+                ttc=float('inf'),
+                capture_time=capture_time,
+                emit_time=0.0,
+                lost=True
+            ))
+        return alerts
+
+    def _dispatch(self, alerts: List[Alert]):
+        for alert in alerts:
+            alert.emit_time = time.perf_counter()
+            self.latencies.append(alert.latency)
+            for callback in self.callbacks:
+                callback(alert)
+
+    def _debounce(self, track_id: str, level: AlertLevel) -> Optional[AlertLevel]:
+        """Return the new active level when a change has persisted long enough"""
+        active = self._active.get(track_id, AlertLevel.NONE)
+        if level == active:
+            self._candidate.pop(track_id, None)
+            return None
+
+        candidate, streak = self._candidate.get(track_id, (level, 0))
+        streak = streak + 1 if candidate == level else 1
+        self._candidate[track_id] = (level, streak)
+
+        # Escalations must persist briefly; de-escalations need a longer calm period
+        required = (self.config.ALERT_DEBOUNCE_FRAMES if level > active
+                    else self.config.ALERT_CLEAR_FRAMES)
+        if streak < required:
+            return None
+
+        del self._candidate[track_id]
+        if level == AlertLevel.NONE:
+            self._active.pop(track_id, None)
+            self._last_seen.pop(track_id, None)
+        else:
+            self._active[track_id] = level
+        return level
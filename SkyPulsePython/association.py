@@ -0,0 +1,148 @@
+"""
+Track-Detection Association Strategies
+Hungarian, greedy and ByteTrack-style two-stage matching on IoU
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Type
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from config import Config, RuntimeConfig
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) arrays of x1, y1, x2, y2 boxes"""
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+@dataclass
+class AssociationResult:
+    matches: List[Tuple[int, int]] = field(default_factory=list)  # (track, detection)
+    unmatched_tracks: List[int] = field(default_factory=list)
+    new_detections: List[int] = field(default_factory=list)  # may start new tracks
+
+class AssociationStrategy(ABC):
+    """Matches predicted track boxes to detection boxes"""
+
+    name = ""
+
+    def __init__(self, runtime_config: Optional[RuntimeConfig] = None):
+        self.config = Config()
+        self.runtime_config = runtime_config or RuntimeConfig()
+
+    @abstractmethod
+    def match_iou(self, iou: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+        """Pairs (row, col) with IoU above threshold, each row/col used at most once"""
+
+    def associate(self, track_boxes: np.ndarray, det_boxes: np.ndarray,
+                  det_scores: np.ndarray, iou_threshold: float) -> AssociationResult:
+        """Match all detections against all tracks in one pass"""
+        n_tracks, n_dets = len(track_boxes), len(det_boxes)
+        if n_tracks == 0 or n_dets == 0:
+            return AssociationResult([], list(range(n_tracks)), list(range(n_dets)))
+
+        matches = self.match_iou(iou_matrix(track_boxes, det_boxes), iou_threshold)
+        matched_tracks = {t for t, _ in matches}
+        matched_dets = {d for _, d in matches}
+        return AssociationResult(
+            matches,
+            [t for t in range(n_tracks) if t not in matched_tracks],
+            [d for d in range(n_dets) if d not in matched_dets]
+        )
+
+class HungarianAssociation(AssociationStrategy):
+    """Globally optimal assignment on 1 - IoU (O(n^3))"""
+
+    name = "hungarian"
+
+    def match_iou(self, iou: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+        rows, cols = linear_sum_assignment(1 - iou)
+        return [(int(r), int(c)) for r, c in zip(rows, cols) if iou[r, c] > threshold]
+
+class GreedyAssociation(AssociationStrategy):
+    """Highest-IoU-first matching over candidate pairs (O(k log k) for k candidates)"""
+
+    name = "greedy"
+
+    def match_iou(self, iou: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+        rows, cols = np.nonzero(iou > threshold)
+        order = np.argsort(-iou[rows, cols], kind='stable')
+
+        used_rows, used_cols = set(), set()
+        matches = []
+        for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+            if r in used_rows or c in used_cols:
+                continue
+            used_rows.add(r)
+            used_cols.add(c)
+            matches.append((r, c))
+        return matches
+
+class ByteTrackAssociation(AssociationStrategy):
+    """Two stages: high-confidence detections first, then low-confidence ones
+
+    Low-confidence detections only keep existing (e.g. occluded) tracks alive;
+    unmatched ones never start new tracks. The split follows the runtime
+    (e.g. QoS-adjusted) confidence threshold.
+    """
+
+    name = "bytetrack"
+
+    def __init__(self, runtime_config: Optional[RuntimeConfig] = None):
+        super().__init__(runtime_config)
+        self.matcher = HungarianAssociation(self.runtime_config)
+
+    def match_iou(self, iou: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+        return self.matcher.match_iou(iou, threshold)
+
+    def associate(self, track_boxes: np.ndarray, det_boxes: np.ndarray,
+                  det_scores: np.ndarray, iou_threshold: float) -> AssociationResult:
+        threshold = self.runtime_config.get('CONFIDENCE_THRESHOLD')
+        high = np.flatnonzero(det_scores >= threshold)
+        low = np.flatnonzero(det_scores < threshold)
+
+        # Stage 1: all tracks vs high-confidence detections
+        first = self.matcher.associate(track_boxes, det_boxes[high], det_scores[high],
+                                       iou_threshold)
+        matches = [(t, int(high[d])) for t, d in first.matches]
+
+        # Stage 2: leftover tracks vs low-confidence detections, stricter IoU
+        remaining = np.array(first.unmatched_tracks, dtype=np.intp)
+        second = self.matcher.associate(track_boxes[remaining], det_boxes[low], det_scores[low],
+                                        self.config.TRACKER_SECOND_STAGE_IOU)
+        matches += [(int(remaining[t]), int(low[d])) for t, d in second.matches]
+
+        return AssociationResult(
+            matches,
+            [int(remaining[t]) for t in second.unmatched_tracks],
+            [int(high[d]) for d in first.new_detections]
+        )
+
+ASSOCIATION_STRATEGIES: Dict[str, Type[AssociationStrategy]] = {
+    cls.name: cls for cls in (HungarianAssociation, GreedyAssociation, ByteTrackAssociation)
+}
+
+def create_association_strategy(name: str,
+                                runtime_config: Optional[RuntimeConfig] = None
+                                ) -> AssociationStrategy:
+    """Instantiate a strategy by config name"""
+    try:
+        strategy_cls = ASSOCIATION_STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown association strategy '{name}'; "
+                         f"choose from {', '.join(ASSOCIATION_STRATEGIES)}")
+    return strategy_cls(runtime_config)
@@ -0,0 +1,85 @@
+"""
+Asynchronous Logging
+Queue-based log routing so hot threads never block on console or disk I/O
+"""
+
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from config import Config
+
+class RateLimitFilter(logging.Filter):
+    """Allows a burst of warnings/errors per message and interval, then suppresses
+
+    Records are keyed by logger and message template (record.msg before
+    %-formatting), so repeated exceptions logged as ("... %s", e) are limited
+    while their changing arguments are not. Records below min_level and
+    records logged with extra={'rate_limit': False} always pass. The first
+    record after a suppressed window reports how many were dropped.
+    """
+
+    def __init__(self, burst: int, interval: float, min_level: int = logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.min_level = min_level
+        self._lock = threading.Lock()
+        # (logger, template, level) -> (window start, records in window, suppressed before)
+        self._windows: Dict[Tuple[str, str, int], Tuple[float, int, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level or not getattr(record, 'rate_limit', True):
+            return True
+        key = (record.name, str(record.msg), record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            start, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - start >= self.interval:
+                start, count = now, 0
+            count += 1
+            if count > self.burst:
+                self._windows[key] = (start, count, suppressed + 1)
+                return False
+            self._windows[key] = (start, count, 0)
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} (suppressed {suppressed} similar messages)"
+            record.args = None
+        return True
+
+def setup_async_logging(level: Optional[str] = None,
+                        log_file: Optional[str] = None) -> logging.handlers.QueueListener:
+    """Route all root logging through a queue to a background writer thread
+
+    Returns the started listener; call stop() on shutdown to flush.
+    """
+    config = Config()
+    level = level or config.LOG_LEVEL
+    log_file = log_file or config.LOG_FILE
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(config.LOG_RATE_LIMIT_BURST,
+                                            config.LOG_RATE_LIMIT_INTERVAL))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    root.setLevel(getattr(logging, level))
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, file_handler,
+                                              respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,345 @@
+"""
+Offline Batch Processor for Recorded Flights
+Splits a video into overlapping segments, processes them in parallel and
+stitches track IDs across segment boundaries into one track file
+"""
+
+import csv
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from config import Config
+
+# frame, track id, class name, confidence, x1, y1, x2, y2, distance
+TrackRow = Tuple[int, str, str, float, float, float, float, float, float]
+
+CSV_HEADER = ['frame', 'time', 'track_id', 'class_name', 'confidence',
+              'x1', 'y1', 'x2', 'y2', 'distance']
+
+@dataclass
+class Segment:
+    index: int
+    start: int  # first frame
+    end: int  # one past the last frame, including the overlap
+
+@dataclass
+class SegmentResult:
+    segment: Segment
+    rows: List[TrackRow]
+    frames: int
+    elapsed: float
+
+def plan_segments(total_frames: int, fps: float, segment_seconds: float,
+                  overlap_seconds: float) -> List[Segment]:
+    """Fixed-length segments, each extended into the next by the overlap"""
+    segment_frames = max(int(segment_seconds * fps), 1)
+    overlap_frames = int(overlap_seconds * fps)
+
+    segments = []
+    for index, start in enumerate(range(0, total_frames, segment_frames)):
+        end = min(start + segment_frames + overlap_frames, total_frames)
+        segments.append(Segment(index, start, end))
+    return segments
+
+# Vision system of the current worker process, loaded once per worker
+_worker_system = None
+
+def _init_worker(model_path: Optional[str], memory_fraction: float, workers: int):
+    """Worker process initializer: load and warm up the model once"""
+    global _worker_system
+    import torch
+
+    # Split the cores between workers; by default every worker would start a
+    # full-size torch and OpenCV pool and oversubscribe the CPU workers-fold
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
+    Config.NUM_WORKERS = threads  # PerformanceOptimizer applies this to OpenCV
+    Config.CUDA_MEMORY_FRACTION = memory_fraction
+    from drone_vision_system import ProfessionalDroneVisionSystem
+    _worker_system = ProfessionalDroneVisionSystem(model_path, standalone=False)
+
+def _process_segment(video_path: str, segment: Segment, fps: float) -> SegmentResult:
+    """Decode, detect and track one segment (runs in a worker process)"""
+    from object_tracker import MultiObjectTracker
+
+    system = _worker_system
+    tracker = MultiObjectTracker(runtime_config=system.runtime_config)
+
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, segment.start)
+
+    rows: List[TrackRow] = []
+    start_time = time.perf_counter()
+    frame_index = segment.start
+    while frame_index < segment.end:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        optimized_frame = system.optimizer.optimize_frame(frame)
+        # The cascade crops around this segment's tracks, not the system tracker's
+        detections = system._detect_objects(optimized_frame,
+                                            list(tracker.tracked_objects.values()),
+                                            frame.shape)
+        if optimized_frame.shape[:2] != frame.shape[:2]:
+            system._rescale_detections(detections, optimized_frame.shape, frame.shape)
+        system.optimizer.release_frame(frame, optimized_frame)
+
+        tracking_start = time.perf_counter()
+        tracked = tracker.update(detections, frame.shape[0], frame_index / fps)
+        if system.cascade is not None:
+            system.cascade.stats.track_time += time.perf_counter() - tracking_start
+
+        for obj in tracked:
+            # Only record tracks actually observed in this frame
+            if obj.missed_frames == 0:
+                rows.append((frame_index, obj.id, obj.class_name, obj.confidence,
+                             *obj.bbox, obj.distance))
+        frame_index += 1
+
+    cap.release()
+    return SegmentResult(segment, rows, frame_index - segment.start,
+                         time.perf_counter() - start_time)
+
+def _iou(box1: Tuple[float, ...], box2: Tuple[float, ...]) -> float:
+    x1, y1 = max(box1[0], box2[0]), max(box1[1], box2[1])
+    x2, y2 = min(box1[2], box2[2]), min(box1[3], box2[3])
+    intersection = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = ((box1[2] - box1[0]) * (box1[3] - box1[1])
+             + (box2[2] - box2[0]) * (box2[3] - box2[1]) - intersection)
+    return intersection / union if union > 0 else 0.0
+
+def match_boundary_tracks(previous: List[TrackRow], following: List[TrackRow],
+                          overlap: Tuple[int, int], min_iou: float) -> Dict[str, str]:
+    """Map track IDs of the following segment to the previous one via the overlap frames"""
+    lo, hi = overlap
+
+    def boxes_by_track(rows):
+        tracks: Dict[str, Dict[int, Tuple[str, Tuple[float, ...]]]] = {}
+        for row in rows:
+            if lo <= row[0] < hi:
+                tracks.setdefault(row[1], {})[row[0]] = (row[2], row[4:8])
+        return tracks
+
+    prev_tracks = boxes_by_track(previous)
+    next_tracks = boxes_by_track(following)
+    if not prev_tracks or not next_tracks:
+        return {}
+
+    prev_ids, next_ids = list(prev_tracks), list(next_tracks)
+    scores = np.zeros((len(prev_ids), len(next_ids)))
+    for i, prev_id in enumerate(prev_ids):
+        prev_frames = prev_tracks[prev_id]
+        for j, next_id in enumerate(next_ids):
+            next_frames = next_tracks[next_id]
+            common = prev_frames.keys() & next_frames.keys()
+            if not common:
+                continue
+            if prev_frames[next(iter(common))][0] != next_frames[next(iter(common))][0]:
+                continue  # class mismatch
+            total = sum(_iou(prev_frames[f][1], next_frames[f][1]) for f in common)
+            # Normalize by the longer presence so brief coincidences score low
+            scores[i, j] = total / max(len(prev_frames), len(next_frames))
+
+    rows, cols = linear_sum_assignment(-scores)
+    return {next_ids[c]: prev_ids[r] for r, c in zip(rows, cols) if scores[r, c] >= min_iou}
+
+def stitch_segments(results: List[SegmentResult], min_iou: float) -> List[TrackRow]:
+    """Consolidate per-segment rows into one table with globally consistent track IDs"""
+    results = sorted(results, key=lambda r: r.segment.index)
+    consolidated: List[TrackRow] = []
+    previous_ids: Dict[str, str] = {}
+
+    for k, result in enumerate(results):
+        segment = result.segment
+
+        # Global IDs: inherit across the boundary, otherwise namespace by segment
+        if k == 0:
+            global_ids = {}
+        else:
+            prev = results[k - 1]
+            overlap = (segment.start, prev.segment.end)
+            matches = match_boundary_tracks(prev.rows, result.rows, overlap, min_iou)
+            global_ids = {local: previous_ids[prev_local] for local, prev_local in matches.items()}
+        for row in result.rows:
+            global_ids.setdefault(row[1], f"{segment.index}-{row[1]}")
+
+        # Each overlap is split at its midpoint between the two segments
+        lo = segment.start if k == 0 else (segment.start + results[k - 1].segment.end) // 2
+        if k + 1 < len(results):
+            hi = (results[k + 1].segment.start + segment.end) // 2
+        else:
+            hi = segment.end
+
+        consolidated.extend((row[0], global_ids[row[1]]) + row[2:]
+                            for row in result.rows if lo <= row[0] < hi)
+        previous_ids = global_ids
+
+    return consolidated
+
+def write_track_file(rows: List[TrackRow], path: str, fps: float):
+    """Write consolidated tracks as CSV, one row per observed track per frame"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for frame, track_id, class_name, conf, x1, y1, x2, y2, distance in rows:
+            writer.writerow([frame, f"{frame / fps:.3f}", track_id, class_name, f"{conf:.3f}",
+                             f"{x1:.1f}", f"{y1:.1f}", f"{x2:.1f}", f"{y2:.1f}",
+                             f"{distance:.2f}"])
+
+def _gpu_memory_gb() -> Optional[float]:
+    """Total memory of the first CUDA device, None when running on the CPU"""
+    config = Config()
+    if not config.DEVICE.startswith('cuda'):
+        return None
+    import torch
+    if not torch.cuda.is_available():
+        return None
+    return torch.cuda.get_device_properties(0).total_memory / 1e9
+
+def plan_workers(requested: Optional[int] = None) -> Tuple[int, float]:
+    """Worker count and per-worker CUDA memory fraction
+
+    Every worker holds its own model and CUDA context, so on a GPU the count
+    is capped by how many fit into device memory, which they then share.
+    """
+    config = Config()
+    workers = requested or config.BATCH_WORKERS or os.cpu_count() or 1
+    memory_gb = _gpu_memory_gb()
+    if memory_gb is None:
+        return workers, config.CUDA_MEMORY_FRACTION
+
+    fit = int(memory_gb * config.CUDA_MEMORY_FRACTION // config.BATCH_GPU_MEMORY_PER_WORKER_GB)
+    workers = max(1, min(workers, fit))
+    return workers, config.CUDA_MEMORY_FRACTION / workers
+
+def process_video_batch(video_path: str, output_path: str,
+                        model_path: Optional[str] = None,
+                        workers: Optional[int] = None,
+                        segment_seconds: Optional[float] = None,
+                        overlap_seconds: Optional[float] = None) -> dict:
+    """Process a recorded video in parallel segments and write one track file"""
+    config = Config()
+    workers, memory_fraction = plan_workers(workers)
+    segment_seconds = segment_seconds or config.BATCH_SEGMENT_SECONDS
+    overlap_seconds = config.BATCH_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Failed to open video: {video_path}")
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+
+    segments = plan_segments(total_frames, fps, segment_seconds, overlap_seconds)
+
+    # Workers are spawned, not forked: a forked child inherits the parent's
+    # CUDA state, which it cannot use
+    context = multiprocessing.get_context("spawn")
+
+    # Populate the model artifact cache once so workers don't race to export it;
+    # done in a child so the model never loads into this process
+    if config.MODEL_CACHE_ENABLED:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            pool.submit(_prime_model_cache, model_path).result()
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(model_path, memory_fraction, workers)) as pool:
+        futures = [pool.submit(_process_segment, video_path, segment, fps)
+                   for segment in segments]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    rows = stitch_segments(results, config.BATCH_STITCH_MIN_IOU)
+    write_track_file(rows, output_path, fps)
+
+    decoded = sum(r.frames for r in results)
+    return {
+        'frames': total_frames,
+        'decoded_frames': decoded,
+        'segments': len(segments),
+        'workers': workers,
+        'elapsed': elapsed,
+        'fps': total_frames / elapsed if elapsed > 0 else 0.0,
+        'tracks': len({row[1] for row in rows}),
+        'rows': len(rows),
+    }
+
+def _prime_model_cache(model_path: Optional[str]):
+    """Load the model once (in a child process), exporting it to the cache if needed"""
+    from drone_vision_system import ProfessionalDroneVisionSystem
+    system = ProfessionalDroneVisionSystem(model_path, standalone=False)
+    system.optimizer.cleanup_memory()
+    del system
+
+def measure_scaling(video_path: str, worker_counts: List[int],
+                    model_path: Optional[str] = None,
+                    segment_seconds: Optional[float] = None,
+                    overlap_seconds: Optional[float] = None) -> List[dict]:
+    """Run the batch with each worker count and report throughput and speedup
+
+    Counts above the GPU memory cap collapse onto the cap, so the effective
+    worker count is reported alongside the requested one.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for requested in worker_counts:
+            output = os.path.join(tmp, f"tracks_{requested}.csv")
+            stats = process_video_batch(video_path, output, model_path, requested,
+                                        segment_seconds, overlap_seconds)
+            stats['requested_workers'] = requested
+            results.append(stats)
+
+    if not results:
+        return results
+    base_fps, base_workers = results[0]['fps'], results[0]['workers']
+    for stats in results:
+        stats['speedup'] = stats['fps'] / base_fps if base_fps > 0 else 0.0
+        stats['efficiency'] = stats['speedup'] * base_workers / stats['workers']
+    return results
+
+def main():
+    """Command line entry point for offline batch processing"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Process a recorded flight video in parallel")
+    parser.add_argument('video', help="Input video file")
+    parser.add_argument('-o', '--output', default=None, help="Output track CSV")
+    parser.add_argument('--model', default=None, help="Model weights")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--segment-seconds', type=float, default=None)
+    parser.add_argument('--overlap-seconds', type=float, default=None)
+    parser.add_argument('--scaling', default=None, metavar="COUNTS",
+                        help="Comma-separated worker counts to measure, e.g. 1,2,4")
+    args = parser.parse_args()
+
+    if args.scaling:
+        counts = [int(n) for n in args.scaling.split(',')]
+        for stats in measure_scaling(args.video, counts, args.model,
+                                     args.segment_seconds, args.overlap_seconds):
+            print(f"workers {stats['requested_workers']:>3} (effective {stats['workers']}): "
+                  f"{stats['fps']:7.1f} FPS, speedup {stats['speedup']:.2f}x, "
+                  f"efficiency {stats['efficiency'] * 100:.0f}%")
+        return
+
+    output = args.output or f"{os.path.splitext(args.video)[0]}_tracks.csv"
+    stats = process_video_batch(args.video, output, args.model, args.workers,
+                                args.segment_seconds, args.overlap_seconds)
+    print(f"Processed {stats['frames']} frames in {stats['segments']} segments on "
+          f"{stats['workers']} workers: {stats['elapsed']:.1f}s ({stats['fps']:.1f} FPS), "
+          f"{stats['tracks']} tracks -> {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+"""
+Drone Vision System Benchmarks
+Micro-benchmarks for the pipeline stages (synthetic scenes unless noted)
+"""
+
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from config import Config
+from object_tracker import Detection, MultiObjectTracker
+
+FRAME_WIDTH = 1280
+FRAME_HEIGHT = 720
+
+def synthetic_scene(num_objects: int = 20, num_frames: int = 600,
+                    seed: int = 0, area: float = 1.0,
+                    jitter_px: float = 1.0) -> List[List[Detection]]:
+    """Moving boxes with jitter; a share of them grow as if approaching the camera
+
+    area < 1 packs the objects into that central fraction of the frame
+    (crowded, overlapping scenes).
+    """
+    rng = np.random.default_rng(seed)
+    class_ids = list(Config.TARGET_CLASSES)
+
+    margin = np.array([FRAME_WIDTH, FRAME_HEIGHT]) * (1 - np.sqrt(area)) / 2 + 100
+    low, high = margin, np.array([FRAME_WIDTH, FRAME_HEIGHT]) - margin
+    centers = rng.uniform(low, high, (num_objects, 2))
+    velocities = rng.normal(0, 2.0, (num_objects, 2))
+    sizes = rng.uniform(30, 90, (num_objects, 2))
+    growth = np.where(rng.random(num_objects) < 0.3, 1.02, 1.0)
+    classes = rng.choice(class_ids, num_objects)
+
+    frames = []
+    for _ in range(num_frames):
+        centers += velocities
+        sizes = np.minimum(sizes * growth[:, None], 400)
+        jitter = rng.normal(0, jitter_px, (num_objects, 4))
+        detections = []
+        for i in range(num_objects):
+            cx, cy = centers[i]
+            w, h = sizes[i]
+            x1, y1, x2, y2 = np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]) + jitter[i]
+            detections.append(Detection(
+                bbox=(float(x1), float(y1), float(x2), float(y2)),
+                confidence=float(rng.uniform(0.3, 0.95)),
+                class_id=int(classes[i]),
+                class_name=Config.TARGET_CLASSES[int(classes[i])],
+                distance=0.0
+            ))
+        frames.append(detections)
+    return frames
+
+def _percentiles_ms(samples) -> str:
+    samples = np.asarray(samples) * 1000
+    if samples.size == 0:
+        return "n/a"
+    return (f"p50 {np.percentile(samples, 50):.3f}ms, p99 {np.percentile(samples, 99):.3f}ms, "
+            f"max {samples.max():.3f}ms")
+
+def benchmark_alert_latency(num_objects: int = 20, num_frames: int = 600):
+    """Capture-to-alert latency of the tracker update + alert engine path"""
+    from alert_engine import AlertEngine
+
+    frames = synthetic_scene(num_objects, num_frames)
+    tracker = MultiObjectTracker()
+    engine = AlertEngine()
+
+    evaluation = []
+    for detections in frames:
+        capture_time = time.perf_counter()
+        tracked = tracker.update(detections, FRAME_HEIGHT)
+        engine.process(tracked, capture_time)
+        evaluation.append(time.perf_counter() - capture_time)
+
+    print(f"Alert latency ({num_objects} objects, {num_frames} frames)")
+    print(f"  per-frame tracker+alerts: {_percentiles_ms(evaluation)}")
+    print(f"  emitted alerts ({len(engine.latencies)}): {_percentiles_ms(engine.latencies)}")
+
+def benchmark_association(object_counts=(10, 50, 200), crowded_counts=(50, 200),
+                          num_frames: int = 200):
+    """Matching cost, agreement with Hungarian and identity accuracy per strategy
+
+    Sparse scenes are nearly trivially separable; crowded scenes pack the
+    objects into a tenth of the frame with 6 px jitter, so boxes overlap
+    and the strategies disagree. Then full-tracker runs.
+    """
+    from association import ASSOCIATION_STRATEGIES
+
+    strategies = {name: cls() for name, cls in ASSOCIATION_STRATEGIES.items()}
+    scenes = ([('sparse', n, {}) for n in object_counts]
+              + [('crowded', n, {'area': 0.1, 'jitter_px': 6.0}) for n in crowded_counts])
+    print(f"Association ({num_frames} frames per scene)")
+    for label, num_objects, scene_args in scenes:
+        frames = synthetic_scene(num_objects, num_frames, **scene_args)
+        rng = np.random.default_rng(1)
+
+        # Previous frame's boxes stand in for track predictions; track i is
+        # object i, detection j is object order[j]
+        pairs, orders = [], []
+        for previous, current in zip(frames, frames[1:]):
+            order = rng.permutation(len(current))
+            orders.append(order)
+            pairs.append((np.array([d.bbox for d in previous], dtype=np.float32),
+                          np.array([current[i].bbox for i in order], dtype=np.float32),
+                          np.array([current[i].confidence for i in order], dtype=np.float32)))
+
+        reference = [set(strategies['hungarian'].associate(*pair, 0.3).matches) for pair in pairs]
+        for name, strategy in strategies.items():
+            samples, agreed, correct = [], 0, 0
+            for pair, order, expected in zip(pairs, orders, reference):
+                start = time.perf_counter()
+                matches = strategy.associate(*pair, 0.3).matches
+                samples.append(time.perf_counter() - start)
+                agreed += len(expected.intersection(matches))
+                correct += sum(order[col] == row for row, col in matches)
+            total = sum(len(expected) for expected in reference)
+            print(f"  {label:>7} {num_objects:3d} objects {name:>9}: {_percentiles_ms(samples)}, "
+                  f"{agreed / max(total, 1) * 100:.1f}% of Hungarian matches, "
+                  f"{correct / (num_objects * len(pairs)) * 100:.1f}% correct identities")
+
+    num_objects = object_counts[len(object_counts) // 2]
+    frames = synthetic_scene(num_objects, num_frames)
+    for name in strategies:
+        tracker = MultiObjectTracker(name)
+        created = set()
+        start = time.perf_counter()
+        for detections in frames:
+            created.update(obj.id for obj in tracker.update(detections, FRAME_HEIGHT))
+        elapsed = time.perf_counter() - start
+        print(f"  tracker {name:>9} ({num_objects} objects): {num_frames / elapsed:.0f} FPS, "
+              f"{len(created)} track ids created")
+
+def benchmark_track_lifecycle(num_objects: int = 20, num_frames: int = 600,
+                              false_positives: int = 5):
+    """Working set with tentative/confirmed tracks vs confirming every detection at once
+
+    Each frame adds single-frame false positives at random positions.
+    """
+    scene = synthetic_scene(num_objects, num_frames)
+    rng = np.random.default_rng(2)
+    for detections in scene:
+        for _ in range(false_positives):
+            x, y = rng.uniform([0, 0], [FRAME_WIDTH - 60, FRAME_HEIGHT - 60])
+            detections.append(Detection(bbox=(x, y, x + 40, y + 40),
+                                        confidence=float(rng.uniform(0.4, 0.6)),
+                                        class_id=2, class_name='car', distance=0.0))
+
+    print(f"Track lifecycle ({num_objects} objects + {false_positives} false positives/frame, "
+          f"{num_frames} frames)")
+    for label in ('immediate', 'lifecycle'):
+        tracker = MultiObjectTracker()
+        if label == 'immediate':
+            # Previous behaviour: every unmatched detection becomes a full track
+            # with one miss budget for all classes, and every track is emitted
+            tracker.confirm_hits = 1
+            tracker.max_missed_by_class = {}
+            tracker.coast_frames = tracker.max_missed_frames
+
+        full, tentative, emitted = [], [], []
+        start = time.perf_counter()
+        for detections in scene:
+            tracked = tracker.update([Detection(d.bbox, d.confidence, d.class_id, d.class_name, 0.0)
+                                      for d in detections], FRAME_HEIGHT)
+            full.append(len(tracker.tracked_objects))
+            tentative.append(len(tracker.tentative_tracks))
+            emitted.append(len(tracked))
+        elapsed = time.perf_counter() - start
+        print(f"  {label:>9}: {np.mean(full):6.1f} full tracks (Kalman + trajectory), "
+              f"{np.mean(tentative):5.1f} placeholders, {np.mean(emitted):6.1f} emitted "
+              f"to render/alerts per frame, {num_frames / elapsed:.0f} FPS")
+
+def benchmark_ground_lut(num_objects: int = 20, num_frames: int = 600):
+    """Distance table reuse under telemetry: cached within tolerance, rebuilt beyond
+
+    Altitude jitters by a few centimetres while climbing 10 -> 30 m and the
+    gimbal pitches once. Exits non-zero unless the table is rebuilt exactly
+    when the pose leaves the tolerance of the pose it was built for.
+    """
+    config = Config()
+    rng = np.random.default_rng(3)
+    climb = np.linspace(10.0, 30.0, num_frames) + rng.normal(0, 0.05, num_frames)
+    pitch = np.where(np.arange(num_frames) < num_frames // 2, 30.0, 45.0)
+
+    tracker = MultiObjectTracker()
+    tracker.confirm_hits = 1
+    expected, built_for, samples = 0, None, []
+    for index, detections in enumerate(synthetic_scene(num_objects, num_frames)):
+        altitude, pitch_deg = float(climb[index]), float(pitch[index])
+        if (built_for is None
+                or abs(altitude - built_for[0]) > config.GROUND_LUT_ALTITUDE_TOLERANCE
+                or abs(pitch_deg - built_for[1]) > config.GROUND_LUT_PITCH_TOLERANCE):
+            expected += 1
+            built_for = (altitude, pitch_deg)
+        start = time.perf_counter()
+        tracker.set_camera_pose(altitude, pitch_deg)
+        tracker.update(detections, FRAME_HEIGHT)
+        samples.append(time.perf_counter() - start)
+
+    builds = tracker.distance_estimator.lut_builds
+    print(f"Ground distance table ({num_objects} objects, {num_frames} frames, climbing 10-30 m)")
+    print(f"  {builds} rebuilds (expected {expected}), per-frame tracker update: "
+          f"{_percentiles_ms(samples)}")
+    if builds != expected:
+        raise SystemExit("ground distance table was not rebuilt on pose changes")
+
+def _panning_video(num_objects: int, num_frames: int, seed: int = 0):
+    """Textured frames from a yawing/pitching camera with moving textured objects
+
+    Yields (frame, ground-truth boxes) at FRAME_WIDTH x FRAME_HEIGHT.
+    """
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    margin = 400
+    world = cv2.GaussianBlur(rng.integers(0, 255, (FRAME_HEIGHT + 2 * margin,
+                                                   FRAME_WIDTH + 2 * margin), dtype=np.uint8),
+                             (0, 0), 3)
+    world = cv2.cvtColor(cv2.normalize(world, None, 0, 255, cv2.NORM_MINMAX), cv2.COLOR_GRAY2BGR)
+    patches = [cv2.cvtColor(rng.integers(0, 255, (24, 24), dtype=np.uint8), cv2.COLOR_GRAY2BGR)
+               for _ in range(num_objects)]
+
+    positions = rng.uniform([margin + 100, margin + 100],
+                            [margin + FRAME_WIDTH - 200, margin + FRAME_HEIGHT - 200],
+                            (num_objects, 2))
+    velocities = rng.normal(0, 1.5, (num_objects, 2))
+    sizes = rng.uniform(50, 90, (num_objects, 2)).astype(int)
+
+    for t in range(num_frames):
+        # Camera yaw/pitch as a smooth but changing pan
+        x0 = int(margin + margin * 0.8 * np.sin(t / 40))
+        y0 = int(margin + margin * 0.4 * np.sin(t / 25))
+        canvas = world.copy()
+        boxes = []
+        for i in range(num_objects):
+            positions[i] += velocities[i]
+            w, h = sizes[i]
+            x, y = int(positions[i][0]), int(positions[i][1])
+            canvas[y:y + h, x:x + w] = cv2.resize(patches[i], (int(w), int(h)),
+                                                  interpolation=cv2.INTER_NEAREST)
+            boxes.append((x - x0, y - y0, x + w - x0, y + h - y0))
+        yield canvas[y0:y0 + FRAME_HEIGHT, x0:x0 + FRAME_WIDTH], np.array(boxes, dtype=np.float32)
+
+def benchmark_optical_flow(num_objects: int = 10, num_frames: int = 300, intervals=(5, 10)):
+    """Track-to-ground-truth IoU between detector runs: Kalman coasting vs optical flow"""
+    from association import iou_matrix
+    from optical_flow import FlowPropagator
+
+    print(f"Optical flow ({num_objects} objects, {num_frames} frames, panning camera)")
+    modes = [(f'every {step}, {"flow" if use_flow else "kalman"}', step, use_flow)
+             for step in intervals for use_flow in (False, True)]
+    for label, step, use_flow in modes:
+        tracker = MultiObjectTracker()
+        tracker.confirm_hits = 1  # measure propagation only, not confirmation delay
+        flow = FlowPropagator() if use_flow else None
+        ious, flow_times = [], []
+        for index, (frame, gt_boxes) in enumerate(_panning_video(num_objects, num_frames)):
+            run_detector = index % step == 0
+            boxes = {}
+            if flow is not None:
+                start = time.perf_counter()
+                result = flow.update(frame, tracker.track_boxes(), propagate=not run_detector)
+                tracker.apply_camera_motion(result.camera_motion)
+                flow_times.append(time.perf_counter() - start)
+                boxes = result.boxes
+            if run_detector:
+                detections = [Detection(bbox=tuple(map(float, box)), confidence=0.9, class_id=0,
+                                        class_name='person', distance=0.0) for box in gt_boxes]
+                tracked = tracker.update(detections, FRAME_HEIGHT)
+            else:
+                tracked = tracker.propagate(boxes, FRAME_HEIGHT)
+            if tracked and not run_detector:
+                ious.append(iou_matrix(gt_boxes, [obj.bbox for obj in tracked]).max(axis=1).mean())
+        timing = f", flow {_percentiles_ms(flow_times)}" if flow_times else ""
+        print(f"  {label:>16}: mean IoU on skipped frames {np.mean(ious):.3f}{timing}")
+
+def benchmark_replay(num_objects: int = 10, num_frames: int = 150, interval: int = 3):
+    """Replaying a detection log must reproduce the live tracks frame by frame"""
+    import tempfile
+    from detection_log import DetectionLogReader, DetectionLogWriter, replay_frames
+    from optical_flow import FlowPropagator
+
+    print(f"Detection log replay ({num_objects} objects, {num_frames} frames, "
+          f"detector every {interval}, optical flow)")
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as log_dir:
+        writer = DetectionLogWriter(log_dir, FRAME_HEIGHT)
+        tracker = MultiObjectTracker()
+        flow = FlowPropagator()
+        live = []
+        for index, (frame, gt_boxes) in enumerate(_panning_video(num_objects, num_frames)):
+            run_detector = index % interval == 0
+            detections = []
+            if run_detector:
+                # Drop some objects and the tail of the video so misses and
+                # trailing empty frames are exercised
+                keep = rng.random(len(gt_boxes)) > 0.2 if index < num_frames - 20 else []
+                detections = [Detection(bbox=tuple(map(float, box)), confidence=0.9,
+                                        class_id=0, class_name='person', distance=0.0)
+                              for box, k in zip(gt_boxes, keep) if k]
+            source_boxes = tracker.track_boxes()
+            result = flow.update(frame, source_boxes, propagate=not run_detector)
+            writer.log_frame(index, index / 30.0, detections, run_detector,
+                             result.camera_motion,
+                             [(source_boxes[obj_id], box) for obj_id, box in result.boxes.items()])
+            tracked = tracker.step(detections, FRAME_HEIGHT, index / 30.0, run_detector,
+                                   result.camera_motion, result.boxes)
+            live.append([obj.bbox for obj in tracked])
+        writer.close()
+
+        reader = DetectionLogReader(log_dir)
+        replayed = [[obj.bbox for obj in tracked]
+                    for _, tracked in replay_frames(reader, MultiObjectTracker())]
+
+    mismatches = sum(a != b for a, b in zip(live, replayed)) + abs(len(live) - len(replayed))
+    print(f"  {len(replayed)}/{len(live)} frames replayed, {sum(map(len, live))} live track "
+          f"states, {mismatches} frames differ from live")
+    if mismatches:
+        raise SystemExit("replay diverged from live tracking")
+
+class _StubBoxes:
+    """Minimal ultralytics Boxes: data rows are x1, y1, x2, y2, conf, cls"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+class _StubModel:
+    """Stands in for YOLO: fixed boxes scaled to the input frame, no weights or downloads"""
+
+    def __init__(self, num_boxes: int = 12, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        centers = rng.uniform(0.1, 0.9, (num_boxes, 2))
+        sizes = rng.uniform(0.03, 0.12, (num_boxes, 2))
+        self.boxes = np.column_stack([
+            centers - sizes / 2, centers + sizes / 2, rng.uniform(0.5, 0.95, num_boxes),
+            rng.choice(list(Config.TARGET_CLASSES), num_boxes)
+        ]).astype(np.float32)
+
+    def __call__(self, frame: np.ndarray, **kwargs):
+        import torch
+        from types import SimpleNamespace
+
+        h, w = frame.shape[:2]
+        data = self.boxes * np.array([w, h, w, h, 1, 1], np.float32)
+        return [SimpleNamespace(boxes=_StubBoxes(torch.from_numpy(data)))]
+
+def benchmark_buffer_pool(num_frames: int = 300, warmup: int = 10, stub_model: bool = True):
+    """Preprocess + inference + track + render through the pooled path
+
+    Feeds a 1920x1080 frame through process_frame and the overlay and exits
+    non-zero if any frame after warm-up creates a new buffer. By default the
+    detector is a stub returning fixed boxes, so the check runs offline;
+    stub_model=False loads the configured model on a real street scene.
+    """
+    import cv2
+    from drone_vision_system import ProfessionalDroneVisionSystem
+
+    # QoS would change the processing resolution (and buffer shapes) mid-run
+    Config.QOS_ENABLED = False
+    if stub_model:
+        class StubModelSystem(ProfessionalDroneVisionSystem):
+            def _load_and_optimize_model(self, model_path):
+                return _StubModel()
+
+        system = StubModelSystem(standalone=False)
+        rng = np.random.default_rng(0)
+        capture = rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+        source = "stub model"
+    else:
+        from ultralytics.utils import ASSETS
+
+        system = ProfessionalDroneVisionSystem(standalone=False)
+        # Capture larger than the processing resolution so preprocessing resizes
+        capture = cv2.resize(cv2.imread(str(ASSETS / "bus.jpg")), (1920, 1080))
+        source = Config.MODEL_NAME
+
+    steady_allocations, samples = [], []
+    for index in range(num_frames):
+        start = time.perf_counter()
+        tracked = system.process_frame(capture, start)
+        display = system._draw_professional_overlay(capture, tracked, 60.0)
+        system.buffer_pool.release(display)
+        samples.append(time.perf_counter() - start)
+        if index > warmup:
+            steady_allocations.append(system.buffer_pool.frame_allocations)
+    detections = system.detection_count
+
+    stats = system.buffer_pool.stats()
+    print(f"Buffer pool ({num_frames} frames of 1920x1080, {source}, {detections} detections)")
+    print(f"  per-frame preprocess+inference+track+render: {_percentiles_ms(samples)}")
+    print(f"  {stats['allocations']} buffers created, {stats['reuses']} reuses, "
+          f"high water {stats['high_water_mb']:.1f} MB, {stats['outstanding']} outstanding")
+    print(f"  steady-state allocations after {warmup} frames: {sum(steady_allocations)}")
+    if sum(steady_allocations) or stats['outstanding']:
+        raise SystemExit("buffer pool: steady-state frames allocated new buffers")
+
+def benchmark_buffer_pool_model(num_frames: int = 300, warmup: int = 10):
+    """Buffer pool check with the configured model (needs ultralytics and its weights)"""
+    benchmark_buffer_pool(num_frames, warmup, stub_model=False)
+
+def benchmark_stream_fanout(viewer_counts=(1, 4, 16), num_frames: int = 150):
+    """Encode cost per frame as MJPEG viewers are added (should stay flat)"""
+    import socket
+    import threading
+    from stream_server import FrameDistributionServer
+
+    rng = np.random.default_rng(0)
+    base = np.tile(np.linspace(0, 255, FRAME_WIDTH, dtype=np.uint8), (FRAME_HEIGHT, 1))
+    frames = [np.dstack([np.roll(base, 16 * i, axis=1)] * 3)
+              + rng.integers(0, 8, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+              for i in range(8)]
+
+    print(f"Stream fan-out ({num_frames} frames of {FRAME_WIDTH}x{FRAME_HEIGHT})")
+    for viewers in viewer_counts:
+        server = FrameDistributionServer(port=0)
+        server.start()
+        stop = threading.Event()
+
+        def viewer():
+            with socket.create_connection((server.host, server.port)) as sock:
+                sock.sendall(b'GET /stream.mjpg HTTP/1.1\r\nHost: bench\r\n\r\n')
+                sock.settimeout(0.5)
+                while not stop.is_set():
+                    try:
+                        if not sock.recv(1 << 16):
+                            break
+                    except socket.timeout:
+                        continue
+
+        threads = [threading.Thread(target=viewer, daemon=True) for _ in range(viewers)]
+        for thread in threads:
+            thread.start()
+        while server.subscribers < viewers:
+            time.sleep(0.01)
+
+        start = time.perf_counter()
+        for i in range(num_frames):
+            server.publish(frames[i % len(frames)])
+            time.sleep(1 / Config.TARGET_FPS)
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+        stats = server.stats()
+        server.stop()
+
+        print(f"  {viewers:3d} viewers: {stats['encoded_frames']} encodes "
+              f"({stats['avg_encode_ms']:.2f}ms each, "
+              f"{server.encode_time_total / elapsed * 100:.1f}% of wall time), "
+              f"{stats['sent_frames']} frames sent, {stats['skipped_frames']} skipped")
+
+BENCHMARKS = {
+    'alerts': benchmark_alert_latency,
+    'association': benchmark_association,
+    'buffers': benchmark_buffer_pool,
+    'buffers_model': benchmark_buffer_pool_model,
+    'flow': benchmark_optical_flow,
+    'ground_lut': benchmark_ground_lut,
+    'lifecycle': benchmark_track_lifecycle,
+    'replay': benchmark_replay,
+    'stream': benchmark_stream_fanout,
+}
+
+# Not part of the default run: they need model weights or downloads
+MODEL_BENCHMARKS = {'buffers_model'}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run pipeline micro-benchmarks")
+    parser.add_argument('names', nargs='*',
+                        help=f"Benchmarks to run: {', '.join(BENCHMARKS)} "
+                             f"(default: all except {', '.join(sorted(MODEL_BENCHMARKS))})")
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    for name in args.names or [n for n in BENCHMARKS if n not in MODEL_BENCHMARKS]:
+        BENCHMARKS[name]()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Buffer Pool
+Reusable numpy arrays keyed by shape and dtype, shared by preprocessing,
+inference output, post-processing and rendering
+"""
+
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+PoolKey = Tuple[Tuple[int, ...], str]
+
+class BufferPool:
+    """Thread-safe free lists of arrays; counts every buffer it has to create
+
+    acquire() hands out an uninitialized array (reused when one of the same
+    shape and dtype was released); release() returns it. After warm-up a
+    steady pipeline should create no new buffers.
+    """
+
+    def __init__(self, max_per_key: Optional[int] = None):
+        self.config = Config()
+        self.max_per_key = max_per_key or self.config.BUFFER_POOL_MAX_PER_KEY
+        self._free: Dict[PoolKey, List[np.ndarray]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.allocations = 0  # buffers created since start
+        self.frame_allocations = 0  # buffers created since begin_frame()
+        self.last_frame_allocations = 0
+        self.reuses = 0
+        self.outstanding = 0  # buffers currently borrowed
+        self.pooled_bytes = 0  # bytes owned by the pool (free + borrowed)
+        self.high_water_bytes = 0
+
+    @staticmethod
+    def _key(shape: Tuple[int, ...], dtype) -> PoolKey:
+        return tuple(int(n) for n in shape), np.dtype(dtype).str
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """Borrow an array of this shape and dtype (contents are undefined)"""
+        key = self._key(shape, dtype)
+        with self._lock:
+            self.outstanding += 1
+            free = self._free.get(key)
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+            self.frame_allocations += 1
+            buffer = np.empty(key[0], dtype=np.dtype(key[1]))
+            self.pooled_bytes += buffer.nbytes
+            self.high_water_bytes = max(self.high_water_bytes, self.pooled_bytes)
+            return buffer
+
+    def release(self, buffer: np.ndarray):
+        """Return a borrowed array; it must not be used afterwards"""
+        key = self._key(buffer.shape, buffer.dtype)
+        with self._lock:
+            self.outstanding -= 1
+            free = self._free[key]
+            if len(free) < self.max_per_key:
+                free.append(buffer)
+            else:
+                self.pooled_bytes -= buffer.nbytes
+
+    def begin_frame(self) -> int:
+        """Start a new per-frame allocation window; returns the previous frame's count"""
+        with self._lock:
+            self.last_frame_allocations = self.frame_allocations
+            self.frame_allocations = 0
+            return self.last_frame_allocations
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'allocations': self.allocations,
+                'reuses': self.reuses,
+                'outstanding': self.outstanding,
+                'last_frame_allocations': self.last_frame_allocations,
+                'pooled_mb': self.pooled_bytes / 1e6,
+                'high_water_mb': self.high_water_bytes / 1e6,
+            }
+
+    def clear(self):
+        """Drop all idle buffers"""
+        with self._lock:
+            for free in self._free.values():
+                self.pooled_bytes -= sum(buffer.nbytes for buffer in free)
+            self._free.clear()
@@ -3,7 +3,74 @@ Advanced Drone Vision System Configuration
 High-performance real-time object detection and tracking
 """
 
-import torch
+import hashlib
+import json
+import os
+import platform
+import threading
+from importlib import metadata
+from typing import Optional
+
+# Distributions whose versions change measured latencies; OpenCV ships under several names
+FINGERPRINT_PACKAGES = {
+    'torch': ('torch',),
+    'torchvision': ('torchvision',),
+    'ultralytics': ('ultralytics',),
+    'cv2': ('opencv-python', 'opencv-python-headless', 'opencv-contrib-python',
+            'opencv-contrib-python-headless'),
+    'numpy': ('numpy',),
+}
+
+def _distribution_version(names: tuple) -> Optional[str]:
+    """Installed version of the first matching distribution, without importing it"""
+    for name in names:
+        try:
+            return metadata.version(name)
+        except metadata.PackageNotFoundError:
+            continue
+    return None
+
+def _gpu_names() -> list:
+    """GPU names; initializes CUDA, so only called when a profile may apply"""
+    try:
+        import torch
+    except ImportError:
+        return []
+    if not torch.cuda.is_available():
+        return []
+    return [torch.cuda.get_device_name(i) for i in range(torch.cuda.device_count())]
+
+def host_fingerprint(query_gpus: bool = True) -> dict:
+    """Hardware, software and inference-path identity a tuned profile was measured on
+
+    A driver, GPU, library or export-format change invalidates the measured
+    latencies. query_gpus=False leaves 'gpus' unset and keeps CUDA untouched.
+    """
+    return {
+        'node': platform.node(),
+        'system': platform.system(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'packages': {key: _distribution_version(names)
+                     for key, names in FINGERPRINT_PACKAGES.items()},
+        # The probe times the model the live system will load
+        'inference_format': Config.MODEL_EXPORT_FORMAT if Config.MODEL_CACHE_ENABLED else "pt",
+        'gpus': _gpu_names() if query_gpus else None,
+    }
+
+def fingerprint_hash(fingerprint: dict) -> str:
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()[:16]
+
+def _default_device() -> str:
+    """Pick CUDA when available; tolerates hosts without torch (e.g. replay tools)"""
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
 
 class Config:
     # Model Configuration
@@ -20,17 +87,48 @@ class Config:
     HALF_PRECISION = True  # FP16 for RTX 2080
     
     # GPU Settings
-    DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+    DEVICE = _default_device()
     CUDA_MEMORY_FRACTION = 0.8
     
+    # Model Artifact Cache (exported models reused across launches)
+    MODEL_CACHE_ENABLED = True
+    MODEL_CACHE_DIR = "model_cache"
+    MODEL_EXPORT_FORMAT = "torchscript"  # "engine" for TensorRT, "onnx" for ONNX Runtime
+    WARMUP_ITERATIONS = 1
+    
     # Video Processing
     FRAME_BUFFER_SIZE = 3
     SKIP_FRAMES = 0  # Process every frame
     RESIZE_WIDTH = 1280
     RESIZE_HEIGHT = 720
+    BUFFER_POOL_MAX_PER_KEY = 4  # idle buffers kept per (shape, dtype)
     
     # Distance Estimation Parameters
     CAMERA_FOCAL_LENGTH = 800  # pixels
+    CAMERA_PRINCIPAL_POINT = None  # (cx, cy) pixels; None uses the frame center
+    CAMERA_PITCH_DEG = 30.0  # camera tilt below the horizon
+    DRONE_ALTITUDE = 10.0  # meters above ground
+    GROUND_LUT_ALTITUDE_TOLERANCE = 0.5  # meters; rebuild distance table beyond this change
+    GROUND_LUT_PITCH_TOLERANCE = 0.5  # degrees
+    DISTANCE_SIZE_WEIGHT = 0.7  # blend of size-based vs ground-plane distance
+    MIN_DISTANCE = 0.5  # meters
+    MAX_DISTANCE = 500.0  # meters
+    
+    # Tracking
+    TRAJECTORY_CAPACITY = 64  # states kept per track (ring buffer)
+    TRACKER_ASSOCIATION = "hungarian"  # "hungarian", "greedy" or "bytetrack"
+    TRACKER_LOW_CONFIDENCE = 0.1  # bytetrack: lowest score kept for the second stage
+    TRACKER_SECOND_STAGE_IOU = 0.5  # bytetrack: IoU needed to match a low-score box
+    TRACK_CONFIRM_HITS = 3  # consecutive hits before a tentative track is confirmed
+    TRACK_TENTATIVE_MAX_MISSED = 1  # misses a tentative track survives
+    TRACK_COAST_FRAMES = 2  # unmatched frames a confirmed track is still emitted
+    TRACK_MAX_MISSED_FRAMES = 10  # default miss budget before a track is removed
+    TRACK_MAX_MISSED_BY_CLASS = {
+        'person': 15,  # slow, often briefly occluded
+        'bicycle': 12,
+        'car': 8,  # fast; a stale prediction drifts quickly
+        'motorcycle': 6,
+    }
     OBJECT_REAL_SIZES = {
         'person': 1.7,      # meters (average height)
         'car': 4.5,         # meters (average length)
@@ -40,6 +138,16 @@ class Config:
         'bicycle': 1.8,     # meters
     }
     
+    # Optical flow between detector runs
+    DETECTION_INTERVAL = 1  # run the detector every N frames; tracks are propagated in between
+    FLOW_ENABLED = False  # LK box propagation + camera motion compensation of the Kalman state
+    FLOW_SCALE = 0.25  # flow runs on a downscaled grayscale frame
+    FLOW_MAX_GLOBAL_CORNERS = 150  # background corners for camera motion
+    FLOW_MAX_TRACK_CORNERS = 10  # corners per track box
+    FLOW_WIN_SIZE = 15
+    FLOW_PYRAMID_LEVELS = 2
+    FLOW_MIN_POINTS = 4  # tracked corners needed for a box or camera estimate
+    
     # Classes of Interest (COCO dataset indices)
     TARGET_CLASSES = {
         0: 'person',
@@ -67,8 +175,124 @@ class Config:
     
     # Logging
     LOG_LEVEL = "INFO"
+    LOG_FILE = "drone_vision.log"
+    LOG_RATE_LIMIT_BURST = 5  # warnings/errors per message template per interval
+    LOG_RATE_LIMIT_INTERVAL = 10.0  # seconds
     PERFORMANCE_LOG_INTERVAL = 100  # frames
     
+    # Flight recorder (recent per-frame records dumped on crash / critical alert / signal)
+    FLIGHT_RECORDER_CAPACITY = 1800  # frames (~30 s at 60 FPS)
+    FLIGHT_RECORDER_DIR = "flight_records"
+    FLIGHT_RECORDER_MIN_DUMP_INTERVAL = 10.0  # seconds between automatic dumps
+    
+    # Detector cascade (nano on every frame, larger model on uncertain frames/crops)
+    CASCADE_ENABLED = False
+    CASCADE_MODEL_NAME = "yolov8m"
+    CASCADE_UNCERTAINTY_MARGIN = 0.15  # confidences within +/- this of the threshold are uncertain
+    CASCADE_MAX_ESCALATIONS_PER_SEC = 5.0
+    CASCADE_NEW_OBJECT_IOU = 0.3  # below this IoU with every track a detection counts as new
+    CASCADE_ESTABLISHED_AGE = 3  # track age (frames) before disagreement triggers escalation
+    CASCADE_CROP_PADDING = 0.2  # crop padding as a fraction of the region size
+    CASCADE_MAX_CROP_FRACTION = 0.5  # larger crops escalate the full frame instead
+    
+    # Annotated video distribution (MJPEG / WebSocket)
+    STREAM_ENABLED = False
+    STREAM_HOST = "127.0.0.1"
+    STREAM_PORT = 8090
+    STREAM_JPEG_QUALITY = 80
+    
+    # Offline batch processing of recorded videos
+    BATCH_WORKERS = None  # processes; None uses all CPU cores (capped by GPU memory on CUDA)
+    BATCH_GPU_MEMORY_PER_WORKER_GB = 2.0  # model, activations and CUDA context of one worker
+    BATCH_SEGMENT_SECONDS = 60.0
+    BATCH_OVERLAP_SECONDS = 2.0
+    BATCH_STITCH_MIN_IOU = 0.5  # mean overlap IoU to join tracks across segments
+    
+    # Detection Log (raw detections for offline tracker replay)
+    DETECTION_LOG_ENABLED = False
+    DETECTION_LOG_DIR = "detection_logs"
+    DETECTION_LOG_CHUNK_SIZE = 4096  # detections per write
+    DETECTION_LOG_FLUSH_INTERVAL = 1.0  # seconds
+    DETECTION_LOG_QUEUE_SIZE = 1024  # frames waiting for the writer; more are dropped
+    DETECTION_LOG_FLOW_MATCH_IOU = 0.5  # replay: logged pre-flow box vs. replay track box
+    
     # Safety and Alerts
     CRITICAL_DISTANCE = 5.0  # meters
-    WARNING_DISTANCE = 10.0  # meters 
\ No newline at end of file
+    WARNING_DISTANCE = 10.0  # meters
+    ALERT_TTC_CRITICAL = 2.0  # seconds to collision
+    ALERT_TTC_WARNING = 5.0  # seconds to collision
+    ALERT_DEBOUNCE_FRAMES = 2  # frames a higher level must persist before it is raised
+    ALERT_CLEAR_FRAMES = 10  # frames a lower level must persist before it is lowered
+    ALERT_UDP_ADDRESS = None  # e.g. ("127.0.0.1", 9870) to publish alerts as JSON datagrams 
+    
+    # Closed-loop QoS (adapts resolution to measured stage latency)
+    QOS_ENABLED = False  # opt-in: changes the processing resolution at runtime
+    QOS_LEVELS = [  # (model input size, resize width, resize height), best first
+        (640, 1280, 720),
+        (512, 960, 540),
+        (416, 848, 480),
+        (320, 640, 360),
+    ]
+    QOS_DOWNGRADE_RATIO = 1.0   # step down when latency exceeds this fraction of the frame budget
+    QOS_UPGRADE_RATIO = 0.6     # step up when latency stays below this fraction
+    QOS_DOWNGRADE_FRAMES = 10   # consecutive slow frames before stepping down
+    QOS_UPGRADE_FRAMES = 90     # consecutive fast frames before stepping up
+    QOS_COOLDOWN_FRAMES = 30    # frames to hold after any change
+
+    # Host probe (python launch_system.py --probe writes a tuned profile)
+    PERFORMANCE_PROFILE_PATH = "performance_profile.json"
+    PROBE_BUDGET_FRACTION = 0.6  # share of the frame budget inference may use
+    PROFILE_SETTINGS = ('DEVICE', 'HALF_PRECISION', 'MODEL_INPUT_SIZE', 'NUM_WORKERS', 'BATCH_SIZE')
+
+def load_performance_profile(path: str = Config.PERFORMANCE_PROFILE_PATH) -> bool:
+    """Apply a tuned profile to Config if it was written on this host"""
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return False
+        
+    # Check everything but the GPUs first: querying GPU names creates a CUDA
+    # context, which importers of config must not pay for a stale profile
+    fingerprint = host_fingerprint(query_gpus=False)
+    recorded = profile.get('fingerprint', {})
+    if any(recorded.get(key) != value for key, value in fingerprint.items() if key != 'gpus'):
+        return False
+    fingerprint['gpus'] = _gpu_names()
+    if profile.get('fingerprint_hash') != fingerprint_hash(fingerprint):
+        return False
+        
+    for name, value in profile.get('settings', {}).items():
+        if name in Config.PROFILE_SETTINGS:
+            setattr(Config, name, value)
+    return True
+
+load_performance_profile()
+
+class RuntimeConfig:
+    """Thread-safe store for parameters that may change while the system runs"""
+    
+    TUNABLE = ('MODEL_INPUT_SIZE', 'RESIZE_WIDTH', 'RESIZE_HEIGHT', 'CONFIDENCE_THRESHOLD',
+               'DRONE_ALTITUDE', 'CAMERA_PITCH_DEG')
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {name: getattr(Config, name) for name in self.TUNABLE}
+        
+    def get(self, name: str):
+        """Read one tunable parameter"""
+        with self._lock:
+            return self._values[name]
+            
+    def update(self, **values):
+        """Atomically change one or more tunable parameters"""
+        unknown = set(values) - set(self.TUNABLE)
+        if unknown:
+            raise KeyError(f"Not runtime-tunable: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._values.update(values)
+            
+    def snapshot(self) -> dict:
+        """Consistent copy of all tunable parameters"""
+        with self._lock:
+            return dict(self._values)
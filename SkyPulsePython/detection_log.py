@@ -0,0 +1,376 @@
+"""
+Columnar Detection Log
+Append-only, memory-mappable per-frame detection storage and tracker replay
+"""
+
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from scipy.optimize import linear_sum_assignment
+
+from association import ASSOCIATION_STRATEGIES, iou_matrix
+from config import Config
+from object_tracker import Detection, MultiObjectTracker
+
+Box = Tuple[float, float, float, float]
+
+# One raw binary file per column; rows are detections in frame order
+COLUMNS = {
+    'frame_index': (np.int64, ()),
+    'timestamp': (np.float64, ()),
+    'bbox': (np.float64, (4,)),
+    'confidence': (np.float32, ()),
+    'class_id': (np.int16, ()),
+}
+
+# One row per processed frame (files prefixed "frames_"), including frames
+# without detections and frames where the detector did not run
+FRAME_COLUMNS = {
+    'frame_index': (np.int64, ()),
+    'timestamp': (np.float64, ()),
+    'detector_ran': (np.uint8, ()),
+    'detections': (np.int32, ()),  # rows of this frame in the detection columns
+    'camera_motion': (np.float64, (2, 3)),  # NaN when not estimated
+    'flow_boxes': (np.int32, ()),  # rows of this frame in the flow columns
+}
+
+# Optical-flow boxes of non-detector frames (files prefixed "flow_"), one row
+# per track flow followed: the track's box before flow and the flowed box
+FLOW_COLUMNS = {
+    'source_bbox': (np.float64, (4,)),
+    'bbox': (np.float64, (4,)),
+}
+
+META_FILE = "meta.json"
+LOG_VERSION = 3
+
+@dataclass
+class LoggedFrame:
+    frame_index: int
+    timestamp: float  # the timestamp the tracker was given
+    detector_ran: bool
+    detections: List[Detection]
+    camera_motion: Optional[np.ndarray] = None
+    flow_boxes: List[Tuple[Box, Box]] = field(default_factory=list)  # (source, flowed)
+
+    def flow_boxes_by_id(self, tracker: MultiObjectTracker) -> Dict[str, Box]:
+        """Map the logged flow boxes onto the tracker's current track ids
+
+        Source boxes are matched to the tracker's boxes by IoU, so replays
+        with different tracker parameters (and thus different track sets)
+        only pick up flow boxes of tracks that actually correspond.
+        """
+        track_boxes = tracker.track_boxes()
+        if not self.flow_boxes or not track_boxes:
+            return {}
+        track_ids = list(track_boxes)
+        iou = iou_matrix([source for source, _ in self.flow_boxes],
+                         list(track_boxes.values()))
+        rows, cols = linear_sum_assignment(1 - iou)
+        return {track_ids[c]: self.flow_boxes[r][1] for r, c in zip(rows, cols)
+                if iou[r, c] >= Config.DETECTION_LOG_FLOW_MATCH_IOU}
+
+def _column_spec(columns: dict) -> dict:
+    return {name: {'dtype': np.dtype(dtype).str, 'shape': list(shape)}
+            for name, (dtype, shape) in columns.items()}
+
+def _open_columns(log_dir: Path, specs: dict, prefix: str = "") -> dict:
+    """Memory-map every column file listed in a meta spec"""
+    columns = {}
+    for name, spec in specs.items():
+        dtype = np.dtype(spec['dtype'])
+        shape = tuple(spec['shape'])
+        path = log_dir / f"{prefix}{name}.bin"
+        row_bytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        rows = path.stat().st_size // row_bytes if path.exists() else 0
+        if rows == 0:
+            columns[name] = np.zeros((0,) + shape, dtype)
+        else:
+            columns[name] = np.memmap(path, dtype=dtype, mode='r', shape=(rows,) + shape)
+    return columns
+
+class DetectionLogWriter:
+    """Batched background writer for raw per-frame detections"""
+
+    def __init__(self, log_dir: str, frame_height: int,
+                 chunk_size: Optional[int] = None, queue_size: Optional[int] = None):
+        self.config = Config()
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size or self.config.DETECTION_LOG_CHUNK_SIZE
+
+        self._write_meta(frame_height)
+        self._files = {name: open(self.log_dir / f"{name}.bin", 'ab') for name in COLUMNS}
+        self._frame_files = {name: open(self.log_dir / f"frames_{name}.bin", 'ab')
+                             for name in FRAME_COLUMNS}
+        self._flow_files = {name: open(self.log_dir / f"flow_{name}.bin", 'ab')
+                            for name in FLOW_COLUMNS}
+
+        # Bounded so a stalled disk costs dropped log frames, not unbounded memory
+        self._queue = queue.Queue(maxsize=queue_size or self.config.DETECTION_LOG_QUEUE_SIZE)
+        self._stop = threading.Event()
+        self.frames_logged = 0
+        self.rows_written = 0
+        self.dropped_frames = 0
+
+        self._thread = threading.Thread(target=self._writer_loop, name="DetectionLogWriter",
+                                        daemon=True)
+        self._thread.start()
+
+    def _write_meta(self, frame_height: int):
+        """Write column layout; existing logs keep their original header"""
+        meta_path = self.log_dir / META_FILE
+        if meta_path.exists():
+            version = json.loads(meta_path.read_text()).get('version', 1)
+            if version != LOG_VERSION:
+                raise ValueError(f"Cannot append to version {version} detection log "
+                                 f"{self.log_dir}; use a new directory")
+            return
+        meta = {
+            'version': LOG_VERSION,
+            'frame_height': int(frame_height),
+            'columns': _column_spec(COLUMNS),
+            'frame_columns': _column_spec(FRAME_COLUMNS),
+            'flow_columns': _column_spec(FLOW_COLUMNS),
+        }
+        meta_path.write_text(json.dumps(meta, indent=2))
+
+    def log_frame(self, frame_index: int, timestamp: float,
+                  detections: Sequence[Detection], detector_ran: bool = True,
+                  camera_motion: Optional[np.ndarray] = None,
+                  flow_boxes: Sequence[Tuple[Box, Box]] = ()) -> bool:
+        """Queue one processed frame; never blocks the caller
+
+        Every frame the tracker sees must be logged with the inputs of
+        MultiObjectTracker.step: detector_ran unset on propagated frames,
+        and flow_boxes as (box before flow, flowed box) pairs for the
+        tracks flow moved, so replay reproduces the live tracks. Frames
+        arriving while the queue is full are dropped and counted.
+        """
+        if self._stop.is_set():
+            self.dropped_frames += 1
+            return False
+        rows = [(d.bbox, d.confidence, d.class_id) for d in detections]
+        flow_rows = [(tuple(source), tuple(box)) for source, box in flow_boxes]
+        try:
+            self._queue.put_nowait((frame_index, timestamp, rows, detector_ran,
+                                    camera_motion, flow_rows))
+        except queue.Full:
+            self.dropped_frames += 1
+            return False
+        self.frames_logged += 1
+        return True
+
+    def _writer_loop(self):
+        """Drain the queue and flush complete chunks to disk"""
+        pending = []
+        pending_rows = 0
+        last_flush = time.perf_counter()
+
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                item = self._queue.get(timeout=0.1)
+                pending.append(item)
+                pending_rows += len(item[2])
+            except queue.Empty:
+                pass
+
+            flush_due = time.perf_counter() - last_flush > self.config.DETECTION_LOG_FLUSH_INTERVAL
+            if pending and (pending_rows >= self.chunk_size or flush_due):
+                self._write_chunk(pending)
+                pending = []
+                pending_rows = 0
+                last_flush = time.perf_counter()
+
+        if pending:
+            self._write_chunk(pending)
+
+    def _write_chunk(self, frames: List[tuple]):
+        """Convert a batch of frames into column arrays and append them
+
+        Detection and flow rows are flushed before the frame rows that
+        reference them, so a crash never leaves a frame record pointing at
+        missing rows.
+        """
+        counts = [len(f[2]) for f in frames]
+        total = sum(counts)
+        frame_index = np.array([f[0] for f in frames], np.int64)
+        timestamp = np.array([f[1] for f in frames], np.float64)
+
+        if total:
+            flat = [row for f in frames for row in f[2]]
+            bbox = np.array([row[0] for row in flat], np.float64).reshape(total, 4)
+            confidence = np.array([row[1] for row in flat], np.float32)
+            class_id = np.array([row[2] for row in flat], np.int16)
+
+            for name, array in (('frame_index', np.repeat(frame_index, counts)),
+                                ('timestamp', np.repeat(timestamp, counts)),
+                                ('bbox', bbox), ('confidence', confidence),
+                                ('class_id', class_id)):
+                self._files[name].write(array.tobytes())
+                self._files[name].flush()
+
+        flow_counts = [len(f[5]) for f in frames]
+        if sum(flow_counts):
+            flow_rows = np.array([pair for f in frames for pair in f[5]],
+                                 np.float64).reshape(-1, 2, 4)
+            for name, array in (('source_bbox', flow_rows[:, 0]), ('bbox', flow_rows[:, 1])):
+                self._flow_files[name].write(np.ascontiguousarray(array).tobytes())
+                self._flow_files[name].flush()
+
+        detector_ran = np.array([f[3] for f in frames], np.uint8)
+        camera_motion = np.array([np.full((2, 3), np.nan) if f[4] is None else f[4]
+                                  for f in frames], np.float64).reshape(-1, 2, 3)
+        for name, array in (('frame_index', frame_index), ('timestamp', timestamp),
+                            ('detector_ran', detector_ran),
+                            ('detections', np.array(counts, np.int32)),
+                            ('camera_motion', camera_motion),
+                            ('flow_boxes', np.array(flow_counts, np.int32))):
+            self._frame_files[name].write(array.tobytes())
+            self._frame_files[name].flush()
+
+        self.rows_written += total
+
+    def close(self):
+        """Flush remaining detections and close column files"""
+        self._stop.set()
+        self._thread.join()
+        for f in (*self._files.values(), *self._frame_files.values(),
+                  *self._flow_files.values()):
+            f.close()
+
+class DetectionLogReader:
+    """Memory-mapped reader for a detection log directory"""
+
+    def __init__(self, log_dir: str):
+        self.log_dir = Path(log_dir)
+        meta = json.loads((self.log_dir / META_FILE).read_text())
+        self.version = meta.get('version', 1)
+        if self.version != LOG_VERSION:
+            raise ValueError(f"Unsupported version {self.version} detection log {self.log_dir}")
+        self.frame_height = meta['frame_height']
+
+        self.columns = _open_columns(self.log_dir, meta['columns'])
+        self.frame_columns = _open_columns(self.log_dir, meta['frame_columns'], prefix="frames_")
+        self.flow_columns = _open_columns(self.log_dir, meta['flow_columns'], prefix="flow_")
+
+        # A crash can leave columns of unequal length; only use complete rows
+        self.num_rows = min(len(col) for col in self.columns.values())
+        num_frames = min(len(col) for col in self.frame_columns.values())
+        flow_rows = min(len(col) for col in self.flow_columns.values())
+
+        counts = np.asarray(self.frame_columns['detections'][:num_frames], np.int64)
+        flow_counts = np.asarray(self.frame_columns['flow_boxes'][:num_frames], np.int64)
+        self._frame_row_ends = np.cumsum(counts)
+        self._flow_row_ends = np.cumsum(flow_counts)
+        # Drop trailing frames whose detection or flow rows did not make it to disk
+        self.num_frames = int(min(
+            np.searchsorted(self._frame_row_ends, self.num_rows, side='right'),
+            np.searchsorted(self._flow_row_ends, flow_rows, side='right')))
+
+    def _detections(self, rows: slice) -> List[Detection]:
+        target_classes = Config.TARGET_CLASSES
+        bboxes = self.columns['bbox'][rows].tolist()
+        confs = self.columns['confidence'][rows].tolist()
+        classes = self.columns['class_id'][rows].tolist()
+        return [
+            Detection(bbox=tuple(b), confidence=c, class_id=k,
+                      class_name=target_classes.get(k, str(k)), distance=0.0)
+            for b, c, k in zip(bboxes, confs, classes)
+        ]
+
+    def iter_records(self) -> Iterator[LoggedFrame]:
+        """Yield every processed frame in order"""
+        frame_indices = self.frame_columns['frame_index'][:self.num_frames].tolist()
+        timestamps = self.frame_columns['timestamp'][:self.num_frames].tolist()
+        detector_ran = self.frame_columns['detector_ran'][:self.num_frames].tolist()
+        camera_motion = self.frame_columns['camera_motion']
+        flow_source = self.flow_columns['source_bbox']
+        flow_bbox = self.flow_columns['bbox']
+        start = flow_start = 0
+        for i in range(self.num_frames):
+            end, flow_end = int(self._frame_row_ends[i]), int(self._flow_row_ends[i])
+            motion = np.array(camera_motion[i])
+            flow_boxes = list(zip(map(tuple, flow_source[flow_start:flow_end].tolist()),
+                                  map(tuple, flow_bbox[flow_start:flow_end].tolist())))
+            yield LoggedFrame(frame_indices[i], timestamps[i], bool(detector_ran[i]),
+                              self._detections(slice(start, end)),
+                              None if np.isnan(motion).any() else motion, flow_boxes)
+            start, flow_start = end, flow_end
+
+def replay_frames(reader: DetectionLogReader, tracker: MultiObjectTracker):
+    """Drive a tracker with the logged frames, yielding (record, confirmed tracks)
+
+    Detector frames update the tracker; the others propagate it with the
+    logged flow boxes, as live.
+    """
+    for record in reader.iter_records():
+        tracked = tracker.step(record.detections, reader.frame_height, record.timestamp,
+                               record.detector_ran, record.camera_motion,
+                               record.flow_boxes_by_id(tracker))
+        yield record, tracked
+
+def replay_detections(log_dir: str, tracker: Optional[MultiObjectTracker] = None) -> dict:
+    """Feed logged detections straight into a tracker and report throughput"""
+    reader = DetectionLogReader(log_dir)
+    tracker = tracker or MultiObjectTracker()
+
+    frames = 0
+    max_tracks = 0
+    start = time.perf_counter()
+    for _, tracked in replay_frames(reader, tracker):
+        max_tracks = max(max_tracks, len(tracked))
+        frames += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        'frames': frames,
+        'detections': reader.num_rows,
+        'elapsed': elapsed,
+        'fps': frames / elapsed if elapsed > 0 else 0.0,
+        'max_tracks': max_tracks,
+    }
+
+def main():
+    """Replay a detection log with optional tracker parameter overrides"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a detection log through the tracker")
+    parser.add_argument('log_dir', help="Detection log directory")
+    parser.add_argument('--max-missed-frames', type=int, default=None,
+                        help="Miss budget for every class (replaces TRACK_MAX_MISSED_BY_CLASS)")
+    parser.add_argument('--class-max-missed', action='append', default=[], metavar="CLASS=N",
+                        help="Per-class miss budget, applied after --max-missed-frames; repeatable")
+    parser.add_argument('--iou-threshold', type=float, default=None)
+    parser.add_argument('--association', choices=sorted(ASSOCIATION_STRATEGIES), default=None)
+    parser.add_argument('--confirm-hits', type=int, default=None)
+    args = parser.parse_args()
+
+    tracker = MultiObjectTracker(args.association)
+    if args.max_missed_frames is not None:
+        tracker.max_missed_frames = args.max_missed_frames
+        tracker.max_missed_by_class = {}
+    for override in args.class_max_missed:
+        class_name, _, budget = override.partition('=')
+        if not budget:
+            parser.error(f"--class-max-missed expects CLASS=N, got '{override}'")
+        tracker.max_missed_by_class[class_name] = int(budget)
+    if args.iou_threshold is not None:
+        tracker.iou_threshold = args.iou_threshold
+    if args.confirm_hits is not None:
+        tracker.confirm_hits = args.confirm_hits
+
+    stats = replay_detections(args.log_dir, tracker)
+    print(f"Replayed {stats['frames']} frames ({stats['detections']} detections) "
+          f"in {stats['elapsed']:.2f}s -> {stats['fps']:.0f} FPS, "
+          f"max {stats['max_tracks']} concurrent tracks")
+
+if __name__ == "__main__":
+    main()
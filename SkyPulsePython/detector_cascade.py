@@ -0,0 +1,174 @@
+"""
+Two-Tier Detector Cascade
+Runs the nano model on every frame and escalates uncertain frames or crops
+to a larger model under a per-second budget
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from association import iou_matrix
+from config import Config
+from object_tracker import Detection, TrackedObject
+
+# detect_fn(frame, model, conf) -> detections in frame coordinates
+DetectFn = Callable[[np.ndarray, object, float], List[Detection]]
+
+class EscalationBudget:
+    """Token bucket capping escalations per second"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(rate, 1.0)
+        self.tokens = self.capacity
+        self.last_refill = time.perf_counter()
+
+    def try_consume(self) -> bool:
+        """Take one token if available"""
+        now = time.perf_counter()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+@dataclass
+class CascadeStats:
+    frames: int = 0
+    uncertain_frames: int = 0  # escalation wanted
+    escalations: int = 0  # escalation performed (within budget)
+    crop_escalations: int = 0
+    detect_time: float = 0.0  # seconds spent in the cascade
+    track_time: float = 0.0  # seconds spent tracking the cascade's detections
+
+    @property
+    def escalation_fraction(self) -> float:
+        return self.escalations / self.frames if self.frames else 0.0
+
+    @property
+    def effective_fps(self) -> float:
+        """Detector frames per second of detection plus tracking"""
+        total = self.detect_time + self.track_time
+        return self.frames / total if total > 0 else 0.0
+
+    def summary(self) -> str:
+        return (f"Cascade: {self.escalation_fraction * 100:.1f}% of {self.frames} frames escalated "
+                f"({self.crop_escalations} crops, "
+                f"{self.uncertain_frames - self.escalations} over budget), "
+                f"effective {self.effective_fps:.1f} FPS (detect + track)")
+
+class DetectorCascade:
+    """Nano model first; larger model only where the nano output is uncertain"""
+
+    def __init__(self, detect_fn: DetectFn, primary_model, secondary_model):
+        self.config = Config()
+        self.detect_fn = detect_fn
+        self.primary_model = primary_model
+        self.secondary_model = secondary_model
+        self.budget = EscalationBudget(self.config.CASCADE_MAX_ESCALATIONS_PER_SEC)
+        self.stats = CascadeStats()
+
+    def find_uncertain_regions(self, detections: List[Detection], threshold: float,
+                               tracked_objects: List[TrackedObject],
+                               track_scale: Tuple[float, float] = (1.0, 1.0)
+                               ) -> List[Tuple[float, ...]]:
+        """Boxes where the nano output needs a second opinion
+
+        track_scale maps track coordinates (capture frame) to the detector frame.
+        """
+        margin = self.config.CASCADE_UNCERTAINTY_MARGIN
+        match_iou = self.config.CASCADE_NEW_OBJECT_IOU
+        regions = []
+
+        # Confidence close to the threshold on either side
+        regions += [d.bbox for d in detections
+                    if threshold - margin <= d.confidence < threshold + margin]
+
+        confident = [d for d in detections if d.confidence >= threshold]
+        established = [t for t in tracked_objects
+                       if t.missed_frames == 0 and t.age >= self.config.CASCADE_ESTABLISHED_AGE]
+        if not established:
+            return regions
+        sx, sy = track_scale
+        track_boxes = np.array([t.bbox for t in established], dtype=np.float32) * [sx, sy, sx, sy]
+        if not confident:
+            return regions + [tuple(box) for box in track_boxes]
+
+        ious = iou_matrix([d.bbox for d in confident], track_boxes)
+        best_track = ious.argmax(axis=1)
+        best_iou = ious.max(axis=1)
+
+        for i, det in enumerate(confident):
+            if best_iou[i] < match_iou:
+                # Newly appeared object
+                regions.append(det.bbox)
+            elif established[best_track[i]].class_name != det.class_name:
+                # Class disagrees with the track
+                regions.append(det.bbox)
+
+        # Established tracks the nano model lost this frame
+        regions += [tuple(box) for box, iou in zip(track_boxes, ious.max(axis=0)) if iou < match_iou]
+        return regions
+
+    def detect(self, frame: np.ndarray, threshold: float,
+               tracked_objects: List[TrackedObject],
+               track_scale: Tuple[float, float] = (1.0, 1.0),
+               output_floor: Optional[float] = None) -> List[Detection]:
+        """Detections for one frame at the given confidence threshold
+
+        output_floor lowers the returned score cutoff below threshold (e.g. for
+        two-stage association); uncertainty is still judged against threshold.
+        """
+        start = time.perf_counter()
+        self.stats.frames += 1
+
+        keep = threshold if output_floor is None else output_floor
+        floor = max(threshold - self.config.CASCADE_UNCERTAINTY_MARGIN, 0.01)
+        detections = self.detect_fn(frame, self.primary_model, min(floor, keep))
+        confident = [d for d in detections if d.confidence >= keep]
+
+        regions = self.find_uncertain_regions(detections, threshold, tracked_objects, track_scale)
+        if regions:
+            self.stats.uncertain_frames += 1
+            if self.budget.try_consume():
+                self.stats.escalations += 1
+                confident = self._escalate(frame, keep, regions, confident)
+
+        self.stats.detect_time += time.perf_counter() - start
+        return confident
+
+    def _escalate(self, frame: np.ndarray, threshold: float,
+                  regions: List[Tuple[float, ...]],
+                  primary_detections: List[Detection]) -> List[Detection]:
+        """Run the secondary model on a crop around the regions, or the full frame"""
+        h, w = frame.shape[:2]
+        boxes = np.array(regions, dtype=np.float32)
+        x1, y1 = boxes[:, 0].min(), boxes[:, 1].min()
+        x2, y2 = boxes[:, 2].max(), boxes[:, 3].max()
+
+        pad = max(self.config.CASCADE_CROP_PADDING * max(x2 - x1, y2 - y1), 32)
+        cx1, cy1 = int(max(x1 - pad, 0)), int(max(y1 - pad, 0))
+        cx2, cy2 = int(min(x2 + pad, w)), int(min(y2 + pad, h))
+
+        crop_fraction = (cx2 - cx1) * (cy2 - cy1) / float(w * h)
+        if crop_fraction > self.config.CASCADE_MAX_CROP_FRACTION:
+            return self.detect_fn(frame, self.secondary_model, threshold)
+
+        self.stats.crop_escalations += 1
+        refined = self.detect_fn(frame[cy1:cy2, cx1:cx2], self.secondary_model, threshold)
+        for det in refined:
+            bx1, by1, bx2, by2 = det.bbox
+            det.bbox = (bx1 + cx1, by1 + cy1, bx2 + cx1, by2 + cy1)
+
+        # Keep nano detections centered outside the crop
+        outside = []
+        for det in primary_detections:
+            mx = (det.bbox[0] + det.bbox[2]) / 2
+            my = (det.bbox[1] + det.bbox[3]) / 2
+            if not (cx1 <= mx < cx2 and cy1 <= my < cy2):
+                outside.append(det)
+        return outside + refined
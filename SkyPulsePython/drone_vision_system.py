@@ -11,31 +11,85 @@ import threading
 import queue
 import time
 from typing import List, Optional, Tuple
-from ultralytics import YOLO
 import logging
 from pathlib import Path
 
-from config import Config
+from config import Config, RuntimeConfig
+from startup_profiler import startup_profiler
+from buffer_pool import BufferPool
 from performance_optimizer import PerformanceOptimizer, FrameBuffer, FPSCounter
 from object_tracker import MultiObjectTracker, Detection
+from optical_flow import FlowPropagator
+from detection_log import DetectionLogWriter
+from qos_controller import QoSController, QoSEvent
+from alert_engine import Alert, AlertEngine, AlertLevel, UdpAlertSink
+from stream_server import FrameDistributionServer
+from detector_cascade import DetectorCascade
+from async_logging import setup_async_logging
+from flight_recorder import FlightRecorder
 
 class ProfessionalDroneVisionSystem:
     """
     Professional-grade drone vision system with high-performance processing
     """
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, standalone: bool = True):
+        """standalone=False (batch workers) leaves logging and crash handlers to the host process"""
         self.config = Config()
-        self.logger = self._setup_logging()
+        self.log_listener = None
+        self.logger = self._setup_logging() if standalone else logging.getLogger("DroneVisionPro")
+        
+        # Recent per-frame records, dumped on crashes, critical alerts or SIGUSR1/SIGBREAK
+        self.flight_recorder = FlightRecorder()
+        if standalone:
+            self.flight_recorder.install_crash_handlers()
+        
+        # Parameters that may change at runtime (read by preprocessing and inference)
+        self.runtime_config = RuntimeConfig()
+        
+        # Reused arrays for preprocessing, inference output and rendering
+        self.buffer_pool = BufferPool()
         
         # Initialize performance optimizer
-        self.optimizer = PerformanceOptimizer()
+        with startup_profiler.phase("optimizer_setup"):
+            self.optimizer = PerformanceOptimizer(self.runtime_config, self.buffer_pool)
         
         # Initialize model
         self.model = self._load_and_optimize_model(model_path)
         
+        # Optional second tier: larger model for uncertain frames/crops
+        self.cascade: Optional[DetectorCascade] = None
+        if self.config.CASCADE_ENABLED:
+            secondary_model = self._load_and_optimize_model(f"{self.config.CASCADE_MODEL_NAME}.pt")
+            self.cascade = DetectorCascade(self._run_model, self.model, secondary_model)
+        
         # Initialize tracking system
-        self.tracker = MultiObjectTracker()
+        self.tracker = MultiObjectTracker(runtime_config=self.runtime_config)
+        
+        # Sparse optical flow: camera motion compensation and box propagation
+        # on frames where the detector does not run
+        self.flow: Optional[FlowPropagator] = None
+        if self.config.FLOW_ENABLED:
+            self.flow = FlowPropagator()
+        
+        # Proximity / time-to-collision alerts, evaluated right after tracking
+        self.alert_engine = AlertEngine()
+        self.alert_engine.add_callback(self._on_alert)
+        self.alert_sink: Optional[UdpAlertSink] = None
+        if self.config.ALERT_UDP_ADDRESS:
+            self.alert_sink = UdpAlertSink(self.config.ALERT_UDP_ADDRESS)
+            self.alert_engine.add_callback(self.alert_sink)
+        
+        # Closed-loop QoS. Cached artifacts are exported for one input size and
+        # letterbox every frame back to it, so lowering the resolution would not
+        # reduce inference cost; QoS needs the eager model (MODEL_CACHE_ENABLED = False)
+        self.qos_controller: Optional[QoSController] = None
+        if self.config.QOS_ENABLED and self.config.MODEL_CACHE_ENABLED:
+            self.logger.warning("QoS disabled: it cannot change the input size of a cached "
+                                "model artifact; set MODEL_CACHE_ENABLED = False to use it")
+        elif self.config.QOS_ENABLED:
+            self.qos_controller = QoSController(self.runtime_config)
+            self.qos_controller.add_listener(self._on_qos_event)
         
         # Initialize performance monitoring
         self.fps_counter = FPSCounter()
@@ -47,6 +101,13 @@ class ProfessionalDroneVisionSystem:
         self.processing_thread = None
         self.running = False
         
+        # Annotated video for remote viewers
+        self.stream_server: Optional[FrameDistributionServer] = None
+        
+        # Raw detection log for offline tracker tuning
+        self.detection_log: Optional[DetectionLogWriter] = None
+        self.processed_frames = 0
+        
         # Performance metrics
         self.total_frames = 0
         self.detection_count = 0
@@ -55,27 +116,28 @@ class ProfessionalDroneVisionSystem:
         self.logger.info("Professional Drone Vision System initialized successfully")
         
     def _setup_logging(self) -> logging.Logger:
-        """Setup professional logging"""
-        logging.basicConfig(
-            level=getattr(logging, self.config.LOG_LEVEL),
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.StreamHandler(),
-                logging.FileHandler('drone_vision.log')
-            ]
-        )
+        """Setup professional logging (queued to a background writer thread)"""
+        self.log_listener = setup_async_logging()
         return logging.getLogger("DroneVisionPro")
         
-    def _load_and_optimize_model(self, model_path: Optional[str]) -> YOLO:
+    def _load_and_optimize_model(self, model_path: Optional[str]) -> "YOLO":
         """Load and optimize YOLO model for maximum performance"""
         try:
+            with startup_profiler.phase("import_ultralytics"):
+                from ultralytics import YOLO
+                
             model_file = model_path if model_path else f"{self.config.MODEL_NAME}.pt"
             self.logger.info(f"Loading model: {model_file}")
             
-            model = YOLO(model_file)
+            with startup_profiler.phase("load_weights"):
+                model = YOLO(model_file)
             
-            # Optimize model for inference
-            model = self.optimizer.optimize_model(model)
+            if self.config.MODEL_CACHE_ENABLED:
+                model = self._load_cached_artifact(model, model_file)
+            else:
+                # Optimize model for inference
+                with startup_profiler.phase("compile_model"):
+                    model = self.optimizer.optimize_model(model)
             
             self.logger.info(f"Model loaded and optimized for {self.config.DEVICE}")
             return model
@@ -84,52 +146,117 @@ class ProfessionalDroneVisionSystem:
             self.logger.error(f"Failed to load model: {e}")
             raise
             
-    def _detect_objects(self, frame: np.ndarray) -> List[Detection]:
-        """Perform object detection on frame"""
+    def _load_cached_artifact(self, model: "YOLO", model_file: str) -> "YOLO":
+        """Swap the PyTorch model for a cached export, exporting it on first use"""
+        from ultralytics import YOLO
+        from model_cache import ModelArtifactCache
+        
+        cache = ModelArtifactCache()
+        half = self.optimizer.use_half_precision
+        export_format = self.config.MODEL_EXPORT_FORMAT
+        weights = str(getattr(model, 'ckpt_path', None) or model_file)
+        
+        key = cache.make_key(weights, self.config.DEVICE, half,
+                             self.config.MODEL_INPUT_SIZE, export_format)
+        artifact = cache.lookup(key)
+        
+        if artifact is None:
+            self.logger.info(f"Model cache miss ({key}); exporting to {export_format}")
+            with startup_profiler.phase("export_model"):
+                exported = model.export(format=export_format,
+                                        imgsz=self.config.MODEL_INPUT_SIZE,
+                                        half=half, device=self.config.DEVICE)
+                artifact = cache.store(key, exported, weights=weights,
+                                       format=export_format)
+        else:
+            self.logger.info(f"Model cache hit: {artifact}")
+            
+        with startup_profiler.phase("load_artifact"):
+            model = YOLO(str(artifact), task="detect")
+        with startup_profiler.phase("warmup"):
+            self.optimizer.warmup_model(model)
+        return model
+            
+    def _detect_objects(self, frame: np.ndarray, tracked_objects: List,
+                        source_shape: Optional[Tuple[int, ...]] = None) -> List[Detection]:
+        """Perform object detection on frame
+        
+        tracked_objects are the current tracks of whichever tracker consumes
+        the detections (the cascade crops around them); source_shape is the
+        capture frame shape their boxes refer to.
+        """
         start_time = time.perf_counter()
+        threshold = self.runtime_config.get('CONFIDENCE_THRESHOLD')
+        
+        # Two-stage association also needs low-score boxes; they only extend
+        # existing tracks and never start new ones
+        output_floor = None
+        if self.config.TRACKER_ASSOCIATION == "bytetrack":
+            output_floor = min(self.config.TRACKER_LOW_CONFIDENCE, threshold)
+        
+        if self.cascade is not None:
+            source_shape = source_shape or frame.shape
+            track_scale = (frame.shape[1] / source_shape[1], frame.shape[0] / source_shape[0])
+            detections = self.cascade.detect(frame, threshold, tracked_objects,
+                                             track_scale, output_floor)
+        else:
+            detections = self._run_model(frame, self.model,
+                                         threshold if output_floor is None else output_floor)
+        
+        # Update performance metrics
+        inference_time = time.perf_counter() - start_time
+        self.avg_inference_time = (self.avg_inference_time * 0.9 + inference_time * 0.1)
         
+        return detections
+        
+    def _run_model(self, frame: np.ndarray, model, conf: float) -> List[Detection]:
+        """Run one model on a frame and convert target-class boxes to detections"""
         # Run inference
-        results = self.model(
+        results = model(
             frame,
-            conf=self.config.CONFIDENCE_THRESHOLD,
+            imgsz=self.runtime_config.get('MODEL_INPUT_SIZE'),
+            conf=conf,
             iou=self.config.IOU_THRESHOLD,
+            max_det=self.config.MAX_DETECTIONS,
             device=self.config.DEVICE,
-            half=self.config.HALF_PRECISION,
+            half=self.optimizer.use_half_precision,
             verbose=False
         )[0]
         
-        # Process detections
+        # Process detections: copy all boxes to the host at once, into a pooled buffer
         detections = []
-        if results.boxes is not None:
-            for box in results.boxes:
-                # Extract box data
-                xyxy = box.xyxy[0].cpu().numpy()
-                conf = float(box.conf[0])
-                cls_id = int(box.cls[0])
+        if results.boxes is not None and len(results.boxes):
+            data = results.boxes.data  # x1, y1, x2, y2, conf, cls
+            count = min(len(data), self.config.MAX_DETECTIONS)
+            
+            host = self.buffer_pool.acquire((self.config.MAX_DETECTIONS, 6), np.float32)
+            try:
+                rows = torch.from_numpy(host[:count])
+                rows[:, :4].copy_(data[:count, :4])
+                rows[:, 4:].copy_(data[:count, -2:])
                 
-                # Filter by target classes
-                if cls_id in self.config.TARGET_CLASSES:
-                    class_name = self.config.TARGET_CLASSES[cls_id]
+                for x1, y1, x2, y2, conf, cls in host[:count].tolist():
+                    cls_id = int(cls)
                     
-                    detection = Detection(
-                        bbox=(float(xyxy[0]), float(xyxy[1]), float(xyxy[2]), float(xyxy[3])),
-                        confidence=conf,
-                        class_id=cls_id,
-                        class_name=class_name,
-                        distance=0.0  # Will be calculated by tracker
-                    )
-                    detections.append(detection)
-        
-        # Update performance metrics
-        inference_time = time.perf_counter() - start_time
-        self.avg_inference_time = (self.avg_inference_time * 0.9 + inference_time * 0.1)
+                    # Filter by target classes
+                    if cls_id in self.config.TARGET_CLASSES:
+                        detections.append(Detection(
+                            bbox=(x1, y1, x2, y2),
+                            confidence=conf,
+                            class_id=cls_id,
+                            class_name=self.config.TARGET_CLASSES[cls_id],
+                            distance=0.0  # Will be calculated by tracker
+                        ))
+            finally:
+                self.buffer_pool.release(host)
         
         return detections
         
     def _draw_professional_overlay(self, frame: np.ndarray, tracked_objects: List, 
                                  fps: float) -> np.ndarray:
-        """Draw professional overlay with tracking info"""
-        overlay = frame.copy()
+        """Draw professional overlay with tracking info (pooled; release after display)"""
+        overlay = self.buffer_pool.acquire(frame.shape, frame.dtype)
+        np.copyto(overlay, frame)
         h, w = frame.shape[:2]
         
         # Draw tracked objects
@@ -165,10 +292,11 @@ class ProfessionalDroneVisionSystem:
             center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
             cv2.circle(overlay, (center_x, center_y), 3, color, -1)
             
-            # Alert for close objects
-            if obj.distance < self.config.CRITICAL_DISTANCE:
+            # Alert for close objects (levels come from the alert engine)
+            alert_level = self.alert_engine.active_level(obj.id)
+            if alert_level == AlertLevel.CRITICAL:
                 cv2.rectangle(overlay, (x1-5, y1-5), (x2+5, y2+5), (0, 0, 255), 3)
-            elif obj.distance < self.config.WARNING_DISTANCE:
+            elif alert_level == AlertLevel.WARNING:
                 cv2.rectangle(overlay, (x1-2, y1-2), (x2+2, y2+2), (0, 255, 255), 2)
         
         # Draw professional HUD
@@ -181,7 +309,7 @@ class ProfessionalDroneVisionSystem:
         h, w = frame.shape[:2]
         
         # Semi-transparent background for HUD
-        hud_bg = np.zeros((120, 300, 3), dtype=np.uint8)
+        hud_bg = self.buffer_pool.acquire((120, 300, 3), np.uint8)
         hud_bg[:] = (30, 30, 30)
         
         # Add HUD info
@@ -196,8 +324,10 @@ class ProfessionalDroneVisionSystem:
             cv2.putText(hud_bg, line, (10, 25 + i * 25), cv2.FONT_HERSHEY_SIMPLEX,
                        0.6, (0, 255, 0), 2)
         
-        # Overlay HUD on frame
-        frame[10:130, 10:310] = cv2.addWeighted(frame[10:130, 10:310], 0.3, hud_bg, 0.7, 0)
+        # Overlay HUD on frame (blended in place)
+        hud_region = frame[10:130, 10:310]
+        cv2.addWeighted(hud_region, 0.3, hud_bg, 0.7, 0, dst=hud_region)
+        self.buffer_pool.release(hud_bg)
         
         # Draw crosshair
         center_x, center_y = w // 2, h // 2
@@ -209,34 +339,154 @@ class ProfessionalDroneVisionSystem:
         while self.running:
             try:
                 if not self.frame_queue.empty():
-                    frame = self.frame_queue.get(timeout=0.01)
-                    
-                    # Optimize frame
-                    optimized_frame = self.optimizer.optimize_frame(frame)
-                    
-                    # Detect objects
-                    detections = self._detect_objects(optimized_frame)
-                    
-                    # Update tracker
-                    tracked_objects = self.tracker.update(detections, frame.shape[0])
+                    frame, capture_time = self.frame_queue.get(timeout=0.01)
+                    tracked_objects = self.process_frame(frame, capture_time)
                     
                     # Put result
                     if not self.result_queue.full():
                         self.result_queue.put((frame, tracked_objects))
                         
-                    self.detection_count += len(detections)
-                    
             except queue.Empty:
                 continue
             except Exception as e:
-                self.logger.error(f"Processing error: {e}")
+                self.logger.error("Processing error: %s", e)
+                self.flight_recorder.dump("processing_error")
                 
+    def process_frame(self, frame: np.ndarray, capture_time: float) -> List:
+        """Detect (every DETECTION_INTERVAL frames), track and raise alerts for one frame
+        
+        Returns the confirmed tracks for rendering.
+        """
+        stage_start = time.perf_counter()
+        frame_allocations = self.buffer_pool.begin_frame()
+        
+        # The detector runs every DETECTION_INTERVAL frames; tracks are
+        # propagated by optical flow (or the Kalman prediction) in between
+        frame_index = self.processed_frames
+        run_detector = frame_index % self.config.DETECTION_INTERVAL == 0
+        detections: List[Detection] = []
+        
+        if run_detector:
+            # Optimize frame
+            optimized_frame = self.optimizer.optimize_frame(frame)
+            preprocess_end = time.perf_counter()
+            
+            # Detect objects
+            detections = self._detect_objects(optimized_frame,
+                                              list(self.tracker.tracked_objects.values()),
+                                              frame.shape)
+            if optimized_frame.shape[:2] != frame.shape[:2]:
+                self._rescale_detections(detections, optimized_frame.shape, frame.shape)
+            self.optimizer.release_frame(frame, optimized_frame)
+            inference_end = time.perf_counter()
+            
+            if frame_index == 0:
+                startup_profiler.mark("first_detection")
+                startup_profiler.report(self.logger.info)
+        else:
+            preprocess_end = inference_end = stage_start
+        self.processed_frames += 1
+        
+        # Update tracker (camera pose from telemetry, read as one consistent pair)
+        tracking_start = time.perf_counter()
+        pose = self.runtime_config.snapshot()
+        self.tracker.set_camera_pose(pose['DRONE_ALTITUDE'], pose['CAMERA_PITCH_DEG'])
+        camera_motion, flow_boxes = None, {}
+        if self.flow is not None:
+            flow = self.flow.update(frame, self.tracker.track_boxes(),
+                                    propagate=not run_detector)
+            camera_motion, flow_boxes = flow.camera_motion, flow.boxes
+            
+        # Persist every frame's tracker inputs (queued to a background
+        # writer) so replay reproduces the live tracks
+        if self.config.DETECTION_LOG_ENABLED:
+            self._log_detections(frame_index, detections, frame.shape[0],
+                                 capture_time, run_detector, camera_motion,
+                                 flow_boxes)
+        tracked_objects = self.tracker.step(detections, frame.shape[0], capture_time,
+                                            run_detector, camera_motion, flow_boxes)
+        tracking_end = time.perf_counter()
+        if self.cascade is not None and run_detector:
+            self.cascade.stats.track_time += tracking_end - tracking_start
+        
+        # Alerts go out before any rendering work
+        self.alert_engine.process(tracked_objects, capture_time)
+        stage_end = time.perf_counter()
+        
+        self.flight_recorder.record(
+            self.processed_frames, preprocess_end - stage_start,
+            inference_end - preprocess_end, tracking_end - tracking_start,
+            stage_end - tracking_end, stage_end - stage_start,
+            len(detections), len(tracked_objects),
+            self.alert_engine.max_active_level(), frame_allocations)
+        
+        # Flow-only frames are cheap and would hide detector overload
+        if self.qos_controller is not None and run_detector:
+            self.qos_controller.observe(stage_end - stage_start)
+            
+        self.detection_count += len(detections)
+        return tracked_objects
+        
+    def set_camera_pose(self, altitude: float, pitch_deg: float):
+        """Feed drone altitude (m) and camera pitch below horizon (deg), e.g. from telemetry
+        
+        Thread-safe; applied from the next processed frame. The ground-plane
+        distance table is rebuilt once the pose moves past its tolerance.
+        """
+        self.runtime_config.update(DRONE_ALTITUDE=altitude, CAMERA_PITCH_DEG=pitch_deg)
+        
+    def _rescale_detections(self, detections: List[Detection],
+                            from_shape: Tuple[int, ...], to_shape: Tuple[int, ...]):
+        """Map boxes from the preprocessed frame back to capture coordinates"""
+        sx = to_shape[1] / from_shape[1]
+        sy = to_shape[0] / from_shape[0]
+        for det in detections:
+            x1, y1, x2, y2 = det.bbox
+            det.bbox = (x1 * sx, y1 * sy, x2 * sx, y2 * sy)
+            
+    def _on_alert(self, alert: Alert):
+        """Log alert level changes; critical alerts also dump the flight recorder"""
+        if alert.level == AlertLevel.CRITICAL:
+            self.flight_recorder.dump("critical_alert")
+        ttc_text = "n/a" if alert.ttc == float('inf') else f"{alert.ttc:.1f}s"
+        lost_text = " (track lost)" if alert.lost else ""
+        # Safety-relevant: never rate limited
+        self.logger.warning(f"{alert.level.name} alert{lost_text}: {alert.class_name} "
+                            f"[{alert.track_id[:4]}] "
+                            f"at {alert.distance:.1f}m, TTC {ttc_text}, "
+                            f"latency {alert.latency * 1000:.1f}ms",
+                            extra={'rate_limit': False})
+        
+    def _on_qos_event(self, event: QoSEvent):
+        """Log QoS level changes"""
+        self.logger.info(f"QoS level {event.old_level} -> {event.new_level} ({event.reason}): "
+                         f"latency {event.latency_ms:.1f}ms vs budget {event.budget_ms:.1f}ms, "
+                         f"settings {event.settings}")
+        
+    def _log_detections(self, frame_index: int, detections: List[Detection],
+                        frame_height: int, timestamp: float, detector_ran: bool,
+                        camera_motion: Optional[np.ndarray], flow_boxes: dict):
+        """Queue this frame's tracker inputs to the columnar detection log"""
+        if self.detection_log is None:
+            run_name = time.strftime("run_%Y%m%d_%H%M%S")
+            log_dir = Path(self.config.DETECTION_LOG_DIR) / run_name
+            self.detection_log = DetectionLogWriter(str(log_dir), frame_height)
+            self.logger.info(f"Logging detections to: {log_dir}")
+        # Flow boxes are logged with the box they started from (the tracker
+        # has not stepped yet); replay matches those to its own tracks by IoU
+        source_boxes = self.tracker.track_boxes()
+        pairs = [(source_boxes[obj_id], box) for obj_id, box in flow_boxes.items()
+                 if obj_id in source_boxes]
+        self.detection_log.log_frame(frame_index, timestamp, detections, detector_ran,
+                                     camera_motion, pairs)
+        
     def process_video_stream(self, source: int = 0, display: bool = True) -> None:
         """
         Process video stream with multi-threading for maximum performance
         """
         # Initialize video capture
-        cap = cv2.VideoCapture(source)
+        with startup_profiler.phase("open_camera"):
+            cap = cv2.VideoCapture(source)
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.config.RESIZE_WIDTH)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.config.RESIZE_HEIGHT)
         cap.set(cv2.CAP_PROP_FPS, self.config.TARGET_FPS)
@@ -247,6 +497,12 @@ class ProfessionalDroneVisionSystem:
             
         self.logger.info(f"Started video processing from source: {source}")
         
+        if self.config.STREAM_ENABLED:
+            self.stream_server = FrameDistributionServer()
+            self.stream_server.start()
+            self.logger.info(f"Streaming annotated video on "
+                             f"http://{self.stream_server.host}:{self.stream_server.port}/stream.mjpg")
+        
         # Start processing thread
         self.running = True
         self.processing_thread = threading.Thread(target=self._processing_worker)
@@ -260,7 +516,7 @@ class ProfessionalDroneVisionSystem:
                     
                 # Add frame to processing queue
                 if not self.frame_queue.full():
-                    self.frame_queue.put(frame)
+                    self.frame_queue.put((frame, time.perf_counter()))
                 
                 # Get processed result
                 if not self.result_queue.empty():
@@ -275,12 +531,21 @@ class ProfessionalDroneVisionSystem:
                     if display:
                         cv2.imshow('Professional Drone Vision System', display_frame)
                         
+                    # The stream server hands the frame back to the pool once encoded
+                    if self.stream_server is not None:
+                        self.stream_server.publish(display_frame, self.buffer_pool.release)
+                    else:
+                        self.buffer_pool.release(display_frame)
+                        
                     self.total_frames += 1
                     
                     # Log performance periodically
                     if self.total_frames % self.config.PERFORMANCE_LOG_INTERVAL == 0:
                         self.logger.info(f"Performance: {fps:.1f} FPS, "
                                        f"{self.detection_count} total detections")
+                        self.logger.info(f"Buffer pool: {self.buffer_pool.stats()}")
+                        if self.cascade is not None:
+                            self.logger.info(self.cascade.stats.summary())
                 
                 # Exit on 'q' key
                 if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -297,11 +562,34 @@ class ProfessionalDroneVisionSystem:
         if self.processing_thread:
             self.processing_thread.join()
             
+        if self.cascade is not None:
+            self.logger.info(self.cascade.stats.summary())
+            
+        if self.alert_sink is not None:
+            self.alert_sink.close()
+            
+        if self.stream_server is not None:
+            self.logger.info(f"Stream stats: {self.stream_server.stats()}")
+            self.stream_server.stop()
+            self.stream_server = None
+            
+        if self.detection_log is not None:
+            self.detection_log.close()
+            self.logger.info(f"Detection log closed: {self.detection_log.rows_written} "
+                             f"detections written")
+            if self.detection_log.dropped_frames:
+                self.logger.warning(f"Detection log dropped {self.detection_log.dropped_frames} "
+                                    f"frames (writer queue full); replay of this run is inexact")
+            self.detection_log = None
+            
         cap.release()
         cv2.destroyAllWindows()
         self.optimizer.cleanup_memory()
         
         self.logger.info("System shutdown complete")
+        if self.log_listener is not None:
+            self.log_listener.stop()
+            self.log_listener = None
 
 def main():
     """Main entry point"""
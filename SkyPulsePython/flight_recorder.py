@@ -0,0 +1,114 @@
+"""
+Flight Recorder
+In-memory ring of recent per-frame records, dumped to disk on crashes,
+critical alerts or on demand via a signal
+"""
+
+import logging
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from config import Config
+
+RECORD_DTYPE = np.dtype([
+    ('frame', np.int64),
+    ('timestamp', np.float64),  # wall clock seconds
+    ('preprocess_ms', np.float32),
+    ('inference_ms', np.float32),
+    ('tracking_ms', np.float32),
+    ('alerts_ms', np.float32),
+    ('total_ms', np.float32),
+    ('detections', np.uint16),
+    ('tracks', np.uint16),
+    ('alert_level', np.uint8),
+    ('allocations', np.uint16),  # new pooled buffers created during the previous frame
+])
+
+class FlightRecorder:
+    """Fixed-size binary ring of per-frame records (single writer)"""
+
+    def __init__(self, capacity: Optional[int] = None, dump_dir: Optional[str] = None):
+        self.config = Config()
+        self.capacity = capacity or self.config.FLIGHT_RECORDER_CAPACITY
+        self.dump_dir = Path(dump_dir or self.config.FLIGHT_RECORDER_DIR)
+        self.records = np.zeros(self.capacity, dtype=RECORD_DTYPE)
+        self.head = 0
+        self.count = 0
+        self.last_dump = 0.0
+        self.logger = logging.getLogger("FlightRecorder")
+
+    def record(self, frame: int, preprocess: float, inference: float, tracking: float,
+               alerts: float, total: float, detections: int, tracks: int, alert_level: int,
+               allocations: int = 0):
+        """Store one frame; stage durations in seconds"""
+        row = self.records[self.head]
+        row['frame'] = frame
+        row['timestamp'] = time.time()
+        row['preprocess_ms'] = preprocess * 1000
+        row['inference_ms'] = inference * 1000
+        row['tracking_ms'] = tracking * 1000
+        row['alerts_ms'] = alerts * 1000
+        row['total_ms'] = total * 1000
+        row['detections'] = min(detections, 65535)
+        row['tracks'] = min(tracks, 65535)
+        row['alert_level'] = alert_level
+        row['allocations'] = min(allocations, 65535)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def snapshot(self) -> np.ndarray:
+        """Copy of the recorded frames, oldest first"""
+        indices = (self.head - self.count + np.arange(self.count)) % self.capacity
+        return self.records[indices]
+
+    def dump(self, reason: str, blocking: bool = False, force: bool = False) -> Optional[Path]:
+        """Write the ring to <dump_dir>/flight_<time>_<reason>.npy
+
+        Non-forced dumps are limited to one per FLIGHT_RECORDER_MIN_DUMP_INTERVAL;
+        non-blocking dumps copy the ring here and write it from a helper thread.
+        """
+        now = time.monotonic()
+        if not force and now - self.last_dump < self.config.FLIGHT_RECORDER_MIN_DUMP_INTERVAL:
+            return None
+        self.last_dump = now
+
+        data = self.snapshot()
+        self.dump_dir.mkdir(parents=True, exist_ok=True)
+        path = self.dump_dir / f"flight_{time.strftime('%Y%m%d_%H%M%S')}_{reason}.npy"
+
+        def write():
+            np.save(path, data)
+            self.logger.warning(f"Flight recorder dumped {len(data)} frames ({reason}): {path}")
+
+        if blocking:
+            write()
+        else:
+            threading.Thread(target=write, name="FlightRecorderDump", daemon=True).start()
+        return path
+
+    def install_crash_handlers(self):
+        """Dump on uncaught exceptions (any thread) and on SIGUSR1 / SIGBREAK"""
+        previous_hook = sys.excepthook
+        previous_thread_hook = threading.excepthook
+
+        def excepthook(exc_type, exc, tb):
+            self.dump("exception", blocking=True, force=True)
+            previous_hook(exc_type, exc, tb)
+
+        def thread_excepthook(args):
+            self.dump("thread_exception", blocking=True, force=True)
+            previous_thread_hook(args)
+
+        sys.excepthook = excepthook
+        threading.excepthook = thread_excepthook
+
+        # Signal handlers can only be installed from the main thread
+        signum = getattr(signal, 'SIGUSR1', None) or getattr(signal, 'SIGBREAK', None)
+        if signum is not None and threading.current_thread() is threading.main_thread():
+            signal.signal(signum, lambda *_: self.dump("signal", force=True))
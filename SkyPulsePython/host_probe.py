@@ -0,0 +1,235 @@
+"""
+Host Capability Probe
+Runs system checks concurrently, micro-benchmarks inference paths, thread
+counts and input sizes, and writes a tuned performance profile for Config
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config, fingerprint_hash, host_fingerprint
+
+PROBE_INPUT_SIZES = [320, 416, 512, 640]
+PROBE_ITERATIONS = 10
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        module = __import__(name)
+    except ImportError:
+        return None
+    return getattr(module, '__version__', 'unknown')
+
+def _check_cuda() -> dict:
+    try:
+        import torch
+    except ImportError:
+        return {'available': False}
+    if not torch.cuda.is_available():
+        return {'available': False}
+    props = torch.cuda.get_device_properties(0)
+    return {'available': True, 'device': props.name,
+            'memory_gb': round(props.total_memory / 1e9, 1)}
+
+def _check_dependencies() -> dict:
+    packages = ['ultralytics', 'torch', 'torchvision', 'cv2', 'numpy', 'scipy']
+    versions = {name: _package_version(name) for name in packages}
+    return {'versions': versions,
+            'missing': [name for name, version in versions.items() if version is None]}
+
+def _check_camera(source=0) -> dict:
+    import cv2
+    cap = cv2.VideoCapture(source)
+    try:
+        if not cap.isOpened():
+            return {'available': False}
+        ret, frame = cap.read()
+        if not ret:
+            return {'available': False}
+        return {'available': True, 'width': frame.shape[1], 'height': frame.shape[0],
+                'fps': cap.get(cv2.CAP_PROP_FPS)}
+    finally:
+        cap.release()
+
+def run_checks() -> dict:
+    """CUDA, dependency and camera checks in parallel"""
+    checks = {'cuda': _check_cuda, 'dependencies': _check_dependencies, 'camera': _check_camera}
+    with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+        futures = {name: pool.submit(fn) for name, fn in checks.items()}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = {'error': str(e)}
+    return results
+
+def _time_call(fn, iterations: int = PROBE_ITERATIONS, warmup: int = 2) -> float:
+    """Median wall time of fn in seconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+def benchmark_thread_counts() -> Dict[int, float]:
+    """Preprocessing (resize 1080p -> 720p) latency per OpenCV thread count"""
+    import cv2
+    frame = np.random.default_rng(0).integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+    cpu_count = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, cpu_count} & set(range(1, cpu_count + 1)))
+
+    results = {}
+    previous = cv2.getNumThreads()
+    for count in counts:
+        cv2.setNumThreads(count)
+        results[count] = _time_call(lambda: cv2.resize(
+            frame, (Config.RESIZE_WIDTH, Config.RESIZE_HEIGHT), interpolation=cv2.INTER_LINEAR))
+    cv2.setNumThreads(previous)
+    return results
+
+def _inference_paths() -> List[Tuple[str, bool]]:
+    """(device, half precision) combinations available on this host"""
+    paths = [("cpu", False)]
+    try:
+        import torch
+        if torch.cuda.is_available():
+            paths += [("cuda", False), ("cuda", True)]
+    except ImportError:
+        pass
+    return paths
+
+def _exported_model(model, weights: str, device: str, half: bool, size: int):
+    """The cached export the live system would load for this path, exporting on a miss"""
+    from ultralytics import YOLO
+    from model_cache import ModelArtifactCache
+
+    cache = ModelArtifactCache()
+    export_format = Config.MODEL_EXPORT_FORMAT
+    key = cache.make_key(weights, device, half, size, export_format)
+    artifact = cache.lookup(key)
+    if artifact is None:
+        exported = model.export(format=export_format, imgsz=size, half=half, device=device)
+        artifact = cache.store(key, exported, weights=weights, format=export_format)
+    return YOLO(str(artifact), task="detect")
+
+def benchmark_inference(model_name: str) -> List[dict]:
+    """Inference latency for every path and input size
+
+    With MODEL_CACHE_ENABLED the live system runs a MODEL_EXPORT_FORMAT export
+    per (device, precision, input size), so that is what gets timed; the
+    exports land in the model cache for the next start.
+    """
+    from ultralytics import YOLO
+    model = YOLO(f"{model_name}.pt")
+    weights = str(getattr(model, 'ckpt_path', None) or f"{model_name}.pt")
+    export_format = Config.MODEL_EXPORT_FORMAT if Config.MODEL_CACHE_ENABLED else "pt"
+
+    results = []
+    for device, half in _inference_paths():
+        for size in PROBE_INPUT_SIZES:
+            label = f"{device}{' fp16' if half else ''} @ {size} ({export_format})"
+            runner = model
+            if Config.MODEL_CACHE_ENABLED:
+                try:
+                    runner = _exported_model(model, weights, device, half, size)
+                except Exception as e:
+                    print(f"  {label}: export failed, skipped ({e})")
+                    continue
+            frame = np.zeros((Config.RESIZE_HEIGHT, Config.RESIZE_WIDTH, 3), dtype=np.uint8)
+            latency = _time_call(lambda: runner(frame, imgsz=size, device=device, half=half,
+                                                verbose=False))
+            results.append({'device': device, 'half': half, 'input_size': size,
+                            'format': export_format, 'latency_ms': latency * 1000})
+            print(f"  {label}: {latency * 1000:.1f}ms")
+    return results
+
+def choose_settings(thread_results: Dict[int, float], inference_results: List[dict]) -> dict:
+    """Largest input size whose best path fits the frame budget, plus the fastest thread count"""
+    budget_ms = 1000.0 / Config.TARGET_FPS * Config.PROBE_BUDGET_FRACTION
+    best_threads = min(thread_results, key=thread_results.get)
+
+    by_size = {}
+    for result in inference_results:
+        best = by_size.get(result['input_size'])
+        if best is None or result['latency_ms'] < best['latency_ms']:
+            by_size[result['input_size']] = result
+
+    fitting = [r for size, r in sorted(by_size.items()) if r['latency_ms'] <= budget_ms]
+    chosen = fitting[-1] if fitting else by_size[min(by_size)]
+
+    return {
+        'DEVICE': chosen['device'],
+        'HALF_PRECISION': chosen['half'],
+        'MODEL_INPUT_SIZE': chosen['input_size'],
+        'NUM_WORKERS': best_threads,
+        'BATCH_SIZE': 1,  # live pipeline processes one frame at a time
+    }
+
+def load_cached_profile(path: Path, fingerprint: dict) -> Optional[dict]:
+    """Existing profile if it was written for this exact fingerprint"""
+    if not path.exists():
+        return None
+    try:
+        profile = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if profile.get('fingerprint_hash') != fingerprint_hash(fingerprint):
+        return None
+    return profile
+
+def run_probe(force: bool = False, path: Optional[str] = None) -> dict:
+    """Probe this host (or reuse the cached result) and write the tuned profile"""
+    path = Path(path or Config.PERFORMANCE_PROFILE_PATH)
+    fingerprint = host_fingerprint()
+
+    if not force:
+        cached = load_cached_profile(path, fingerprint)
+        if cached is not None:
+            print(f"✓ Host unchanged; reusing profile {path}")
+            return cached
+
+    print("=== Host Checks ===")
+    checks = run_checks()
+    for name, result in checks.items():
+        print(f"  {name}: {result}")
+    if checks['dependencies'].get('missing'):
+        raise RuntimeError(f"Missing packages: {', '.join(checks['dependencies']['missing'])}")
+
+    print("=== Thread Count Benchmark ===")
+    thread_results = benchmark_thread_counts()
+    for count, latency in thread_results.items():
+        print(f"  {count} threads: {latency * 1000:.2f}ms")
+
+    print("=== Inference Benchmark ===")
+    inference_results = benchmark_inference(Config.MODEL_NAME)
+    if not inference_results:
+        raise RuntimeError("No inference path could be benchmarked")
+
+    settings = choose_settings(thread_results, inference_results)
+    profile = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'fingerprint': fingerprint,
+        'fingerprint_hash': fingerprint_hash(fingerprint),
+        'checks': checks,
+        'measurements': {
+            'thread_counts_ms': {str(k): v * 1000 for k, v in thread_results.items()},
+            'inference': inference_results,
+        },
+        'settings': settings,
+    }
+    path.write_text(json.dumps(profile, indent=2))
+    print(f"✓ Tuned profile written to {path}: {settings}")
+    return profile
+
+if __name__ == "__main__":
+    run_probe(force='--force' in sys.argv)
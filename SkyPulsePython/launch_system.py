@@ -7,14 +7,16 @@ import os
 import sys
 import subprocess
 import platform
-import torch
 import logging
 from pathlib import Path
 
+from startup_profiler import startup_profiler
+
 def check_cuda_availability():
     """Check CUDA availability and GPU info"""
     print("=== GPU & CUDA Status ===")
     
+    import torch
     if torch.cuda.is_available():
         device_count = torch.cuda.device_count()
         current_device = torch.cuda.current_device()
@@ -103,6 +105,7 @@ def optimize_system():
         print("⚠ Could not apply OpenCV optimizations")
     
     # PyTorch optimizations
+    import torch
     if torch.cuda.is_available():
         torch.backends.cudnn.benchmark = True
         torch.backends.cudnn.deterministic = False
@@ -147,8 +150,34 @@ def show_performance_tips():
     print("• Close browser tabs and other GPU-using applications")
     print("• For best performance, run as administrator")
 
+def run_host_probe(force: bool = False) -> bool:
+    """Non-interactive probe: benchmark this host and write the tuned profile"""
+    from host_probe import run_probe
+    
+    try:
+        with startup_profiler.phase("host_probe"):
+            run_probe(force=force)
+    except Exception as e:
+        print(f"\n❌ Host probe failed: {e}")
+        return False
+    
+    startup_profiler.report()
+    return True
+
 def main():
     """Main launcher function"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Professional Drone Vision System Launcher")
+    parser.add_argument('--probe', action='store_true',
+                        help="Probe host capabilities, write a tuned profile and exit")
+    parser.add_argument('--force-probe', action='store_true',
+                        help="Re-run the probe even if the host fingerprint is unchanged")
+    args = parser.parse_args()
+    
+    if args.probe or args.force_probe:
+        return run_host_probe(force=args.force_probe)
+    
     print("🚁 Professional Drone Vision System Launcher")
     print("=" * 50)
     
@@ -157,9 +186,12 @@ def main():
     print(f"Python: {sys.version}")
     
     # Run checks
-    cuda_ok = check_cuda_availability()
-    deps_ok = check_dependencies()
-    camera_ok = check_camera(0)
+    with startup_profiler.phase("check_cuda"):
+        cuda_ok = check_cuda_availability()
+    with startup_profiler.phase("check_dependencies"):
+        deps_ok = check_dependencies()
+    with startup_profiler.phase("check_camera"):
+        camera_ok = check_camera(0)
     
     if not deps_ok:
         print("\n❌ Dependencies missing. Please install requirements first.")
@@ -170,11 +202,15 @@ def main():
         print("\n⚠ Camera not available. System will try to proceed anyway.")
     
     # Apply optimizations
-    optimize_system()
+    with startup_profiler.phase("optimize_system"):
+        optimize_system()
     
     # Show tips
     show_performance_tips()
     
+    print("\n=== Startup Timing ===")
+    startup_profiler.report()
+    
     # Launch confirmation
     print("\n" + "="*50)
     if cuda_ok:
@@ -191,10 +227,14 @@ def main():
         print("\n❌ Launch cancelled")
         return False
     
+    # Time spent waiting for ENTER is not startup cost
+    startup_profiler.reset()
+    
     # Launch the main system
     print("\n🚁 Launching Professional Drone Vision System...")
     try:
-        from drone_vision_system import main as vision_main
+        with startup_profiler.phase("import_vision_system"):
+            from drone_vision_system import main as vision_main
         vision_main()
     except Exception as e:
         print(f"\n❌ Launch failed: {e}")
@@ -0,0 +1,90 @@
+"""
+Model Artifact Cache
+On-disk cache of exported/optimized models so later starts skip compilation
+"""
+
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import Config
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, streamed in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _device_signature(device: str) -> str:
+    """Device identity including GPU model, since engines are GPU specific"""
+    if device.startswith("cuda"):
+        import torch
+        index = torch.cuda.current_device()
+        return f"{device}:{torch.cuda.get_device_name(index)}"
+    return device
+
+def _library_versions() -> dict:
+    """Versions that change the exported artifact format"""
+    versions = {}
+    try:
+        import torch
+        versions['torch'] = torch.__version__
+    except ImportError:
+        pass
+    try:
+        import ultralytics
+        versions['ultralytics'] = ultralytics.__version__
+    except ImportError:
+        pass
+    return versions
+
+class ModelArtifactCache:
+    """Stores exported model artifacts keyed by weights, device, precision and input size"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.config = Config()
+        self.cache_dir = Path(cache_dir or self.config.MODEL_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def make_key(self, weights_path: str, device: str, half: bool, input_size: int,
+                 export_format: str) -> str:
+        """Cache key for one (weights, device, precision, input size, format) combination"""
+        fields = {
+            'weights': hash_file(weights_path),
+            'device': _device_signature(device),
+            'half': bool(half),
+            'input_size': int(input_size),
+            'format': export_format,
+            'versions': _library_versions(),
+        }
+        blob = json.dumps(fields, sort_keys=True).encode()
+        return hashlib.sha256(blob).hexdigest()[:16]
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Return the cached artifact path for a key, if present"""
+        meta_path = self.cache_dir / f"{key}.json"
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        artifact = self.cache_dir / meta['artifact']
+        return artifact if artifact.exists() else None
+
+    def store(self, key: str, artifact_path: str, **info) -> Path:
+        """Move an exported artifact into the cache under the given key"""
+        source = Path(artifact_path)
+        target = self.cache_dir / f"{key}{''.join(source.suffixes) or source.suffix}"
+        if target.exists():
+            if target.is_dir():
+                shutil.rmtree(target)
+            else:
+                target.unlink()
+        shutil.move(str(source), str(target))
+
+        meta = {'artifact': target.name, 'created': time.time(), **info}
+        (self.cache_dir / f"{key}.json").write_text(json.dumps(meta, indent=2))
+        return target
@@ -7,9 +7,12 @@ import numpy as np
 import cv2
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from scipy.optimize import linear_sum_assignment
+from enum import IntEnum
 import uuid
-from config import Config
+import time
+from association import create_association_strategy
+from config import Config, RuntimeConfig
+from optical_flow import transform_box
 
 @dataclass
 class Detection:
@@ -19,6 +22,56 @@ class Detection:
     class_name: str
     distance: float
 
+class TrajectoryBuffer:
+    """Fixed-capacity ring buffer of recent track states"""
+    
+    FIELDS = ('timestamp', 'cx', 'cy', 'w', 'h', 'distance')
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.zeros((capacity, len(self.FIELDS)), dtype=np.float64)
+        self.head = 0  # next write position
+        self.count = 0
+        
+    def __len__(self) -> int:
+        return self.count
+        
+    def append(self, timestamp: float, cx: float, cy: float, w: float, h: float,
+               distance: float):
+        """Overwrite the oldest state once full"""
+        row = self.data[self.head]
+        row[0], row[1], row[2], row[3], row[4], row[5] = timestamp, cx, cy, w, h, distance
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        
+    def last(self, n: Optional[int] = None) -> np.ndarray:
+        """Most recent n states, oldest first (copy of shape (n, len(FIELDS)))"""
+        n = self.count if n is None else min(n, self.count)
+        indices = (self.head - n + np.arange(n)) % self.capacity
+        return self.data[indices]
+
+class TrackState(IntEnum):
+    TENTATIVE = 0  # placeholder until enough consecutive hits
+    CONFIRMED = 1  # emitted to rendering and alerts
+    LOST = 2  # unmatched past the coast window; kept only for re-association
+
+@dataclass
+class TentativeTrack:
+    """Cheap placeholder for an unconfirmed object: no id, Kalman filter or distance"""
+    bbox: Tuple[float, float, float, float]
+    velocity: Tuple[float, float]  # box shift over the last hit, pixels/frame
+    detection: Detection  # latest detection, used to seed the confirmed track
+    hits: int = 1
+    missed_frames: int = 0  # detector runs without a match
+    frames_since_hit: int = 0  # processed frames, including propagated ones
+    state: TrackState = TrackState.TENTATIVE
+    
+    def predicted_bbox(self) -> Tuple[float, float, float, float]:
+        steps = self.frames_since_hit
+        dx, dy = self.velocity[0] * steps, self.velocity[1] * steps
+        x1, y1, x2, y2 = self.bbox
+        return (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+
 @dataclass
 class TrackedObject:
     id: str
@@ -30,11 +83,15 @@ class TrackedObject:
     age: int
     missed_frames: int
     kalman_filter: cv2.KalmanFilter
+    acceleration: Tuple[float, float]  # ax, ay in pixels/frame^2
+    trajectory: TrajectoryBuffer
+    state: TrackState = TrackState.CONFIRMED
 
 class KalmanTracker:
     """Kalman filter for object tracking"""
     
-    def __init__(self, bbox: Tuple[float, float, float, float]):
+    def __init__(self, bbox: Tuple[float, float, float, float],
+                 velocity: Tuple[float, float] = (0.0, 0.0)):
         self.kalman = cv2.KalmanFilter(8, 4)
         self.kalman.measurementMatrix = np.array([
             [1, 0, 0, 0, 0, 0, 0, 0],
@@ -60,13 +117,14 @@ class KalmanTracker:
         # Initialize state
         x1, y1, x2, y2 = bbox
         cx, cy, w, h = (x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1
-        self.kalman.statePre = np.array([cx, cy, w, h, 0, 0, 0, 0], np.float32)
-        self.kalman.statePost = np.array([cx, cy, w, h, 0, 0, 0, 0], np.float32)
+        vx, vy = velocity
+        self.kalman.statePre = np.array([cx, cy, w, h, vx, vy, 0, 0], np.float32)
+        self.kalman.statePost = np.array([cx, cy, w, h, vx, vy, 0, 0], np.float32)
         
     def predict(self) -> Tuple[float, float, float, float]:
         """Predict next position"""
         predicted = self.kalman.predict()
-        cx, cy, w, h = predicted[0], predicted[1], predicted[2], predicted[3]
+        cx, cy, w, h = (float(v) for v in predicted.ravel()[:4])
         x1, y1, x2, y2 = cx - w/2, cy - h/2, cx + w/2, cy + h/2
         return x1, y1, x2, y2
         
@@ -76,14 +134,42 @@ class KalmanTracker:
         cx, cy, w, h = (x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1
         measurement = np.array([cx, cy, w, h], np.float32)
         self.kalman.correct(measurement)
+        
+    def apply_camera_motion(self, affine: np.ndarray):
+        """Move the state into the current camera frame (2x3 similarity transform)"""
+        state = self.kalman.statePost.ravel().copy()
+        linear = affine[:, :2]
+        scale = np.sqrt(abs(np.linalg.det(linear)))
+        state[0:2] = linear @ state[0:2] + affine[:, 2]
+        state[2:4] *= scale
+        state[4:6] = linear @ state[4:6]
+        state[6:8] *= scale
+        self.kalman.statePost = state.reshape(8, 1).astype(np.float32)
 
 class AdvancedDistanceEstimator:
     """Advanced distance estimation using multiple methods"""
     
+    # Apparent-size corrections per class
+    SIZE_CORRECTIONS = {'person': 0.9, 'car': 1.1, 'truck': 1.1}
+    
     def __init__(self):
         self.config = Config()
         self.calibration_data = {}
         
+        # Camera pose for the ground-plane model
+        self.altitude = self.config.DRONE_ALTITUDE
+        self.pitch_deg = self.config.CAMERA_PITCH_DEG
+        
+        # Per-pixel-row distance table and the pose it was built for
+        self._ground_lut: Optional[np.ndarray] = None
+        self._lut_key: Optional[Tuple[int, float, float]] = None
+        self.lut_builds = 0
+        
+    def set_camera_pose(self, altitude: float, pitch_deg: float):
+        """Update drone altitude (m) and camera pitch below horizon (deg)"""
+        self.altitude = altitude
+        self.pitch_deg = pitch_deg
+        
     def estimate_distance_by_size(self, bbox_width: float, bbox_height: float, 
                                 class_name: str) -> float:
         """Estimate distance using apparent size"""
@@ -101,164 +187,351 @@ class AdvancedDistanceEstimator:
         distance = (real_size * self.config.CAMERA_FOCAL_LENGTH) / apparent_size
         
         # Apply distance correction based on object type
-        if class_name == 'person':
-            distance *= 0.9  # People often appear smaller
-        elif class_name in ['car', 'truck']:
-            distance *= 1.1  # Vehicles often appear larger
+        # (people often appear smaller, vehicles larger)
+        distance *= self.SIZE_CORRECTIONS.get(class_name, 1.0)
             
-        return max(0.5, min(distance, 500.0))  # Clamp between 0.5m and 500m
+        return max(self.config.MIN_DISTANCE, min(distance, self.config.MAX_DISTANCE))
+        
+    def estimate_distances_by_size(self, widths: np.ndarray, heights: np.ndarray,
+                                   class_names: List[str]) -> np.ndarray:
+        """Vectorized size-based distance; -1 where the class size is unknown"""
+        real_sizes = np.array([self.config.OBJECT_REAL_SIZES.get(name, -1.0)
+                               for name in class_names], dtype=np.float32)
+        corrections = np.array([self.SIZE_CORRECTIONS.get(name, 1.0)
+                                for name in class_names], dtype=np.float32)
+        apparent = np.maximum(widths, heights)
+        
+        valid = (real_sizes > 0) & (apparent > 0)
+        distances = np.full(len(class_names), -1.0, dtype=np.float32)
+        distances[valid] = np.clip(
+            real_sizes[valid] * self.config.CAMERA_FOCAL_LENGTH / apparent[valid]
+            * corrections[valid],
+            self.config.MIN_DISTANCE, self.config.MAX_DISTANCE)
+        return distances
+        
+    def _get_ground_lut(self, frame_height: int) -> np.ndarray:
+        """Per-row ground distance table, rebuilt only when the pose moves past tolerance"""
+        if self._lut_key is not None:
+            height, altitude, pitch = self._lut_key
+            if (height == frame_height
+                    and abs(self.altitude - altitude) <= self.config.GROUND_LUT_ALTITUDE_TOLERANCE
+                    and abs(self.pitch_deg - pitch) <= self.config.GROUND_LUT_PITCH_TOLERANCE):
+                return self._ground_lut
+                
+        principal = self.config.CAMERA_PRINCIPAL_POINT
+        cy = principal[1] if principal else frame_height / 2.0
+        rows = np.arange(frame_height, dtype=np.float64) + 0.5
+        
+        # Angle below the horizon of the ray through each pixel row
+        angles = np.radians(self.pitch_deg) + np.arctan((rows - cy) / self.config.CAMERA_FOCAL_LENGTH)
+        
+        # Slant range to where the ray meets the ground; rays at or above the
+        # horizon never hit the ground
+        distances = np.full(frame_height, self.config.MAX_DISTANCE, dtype=np.float64)
+        below_horizon = angles > 0
+        distances[below_horizon] = self.altitude / np.sin(angles[below_horizon])
+        
+        self._ground_lut = np.clip(distances, self.config.MIN_DISTANCE,
+                                   self.config.MAX_DISTANCE).astype(np.float32)
+        self._lut_key = (frame_height, self.altitude, self.pitch_deg)
+        self.lut_builds += 1
+        return self._ground_lut
+        
+    def estimate_distances_by_position(self, bottoms: np.ndarray, frame_height: int) -> np.ndarray:
+        """Ground-plane distance for many box bottoms with one table gather"""
+        lut = self._get_ground_lut(frame_height)
+        rows = np.clip(bottoms.astype(np.intp), 0, frame_height - 1)
+        return lut[rows]
         
     def estimate_distance_by_position(self, bbox: Tuple[float, float, float, float],
                                     frame_height: int) -> float:
-        """Estimate distance using vertical position in frame"""
-        _, y1, _, y2 = bbox
-        obj_bottom = y2
-        
-        # Objects lower in frame are generally closer
-        relative_position = obj_bottom / frame_height
-        
-        if relative_position > 0.8:  # Bottom of frame
-            return 2.0
-        elif relative_position > 0.6:
-            return 5.0
-        elif relative_position > 0.4:
-            return 10.0
-        else:
-            return 20.0
+        """Estimate distance from where the box bottom meets the ground plane"""
+        bottoms = np.array([bbox[3]], dtype=np.float32)
+        return float(self.estimate_distances_by_position(bottoms, frame_height)[0])
+        
+    def estimate_distances(self, detections: List[Detection], frame_height: int) -> np.ndarray:
+        """Blend size-based and ground-plane distance for all detections of a frame"""
+        if not detections:
+            return np.zeros(0, dtype=np.float32)
+            
+        boxes = np.array([d.bbox for d in detections], dtype=np.float32)
+        return self.estimate_box_distances(boxes, [d.class_name for d in detections],
+                                           frame_height)
+        
+    def estimate_box_distances(self, boxes: np.ndarray, class_names: List[str],
+                               frame_height: int) -> np.ndarray:
+        """Blended distance for an (N, 4) box array"""
+        widths = boxes[:, 2] - boxes[:, 0]
+        heights = boxes[:, 3] - boxes[:, 1]
+        
+        by_size = self.estimate_distances_by_size(widths, heights, class_names)
+        by_position = self.estimate_distances_by_position(boxes[:, 3], frame_height)
+        
+        weight = self.config.DISTANCE_SIZE_WEIGHT
+        return np.where(by_size > 0, weight * by_size + (1 - weight) * by_position, by_position)
 
 class MultiObjectTracker:
     """Advanced multi-object tracker with Kalman filtering"""
     
-    def __init__(self):
+    def __init__(self, association: Optional[str] = None,
+                 runtime_config: Optional[RuntimeConfig] = None):
         self.config = Config()
         self.tracked_objects: Dict[str, TrackedObject] = {}
+        self.tentative_tracks: List[TentativeTrack] = []
         self.distance_estimator = AdvancedDistanceEstimator()
+        self.association = create_association_strategy(
+            association or self.config.TRACKER_ASSOCIATION, runtime_config)
         self.next_id = 0
-        self.max_missed_frames = 10
+        self.max_missed_frames = self.config.TRACK_MAX_MISSED_FRAMES
+        self.max_missed_by_class = dict(self.config.TRACK_MAX_MISSED_BY_CLASS)
+        self.confirm_hits = self.config.TRACK_CONFIRM_HITS
+        self.tentative_max_missed = self.config.TRACK_TENTATIVE_MAX_MISSED
+        self.coast_frames = self.config.TRACK_COAST_FRAMES
         self.iou_threshold = 0.3
         
-    def _calculate_iou(self, box1: Tuple[float, float, float, float],
-                      box2: Tuple[float, float, float, float]) -> float:
-        """Calculate Intersection over Union"""
-        x1_1, y1_1, x2_1, y2_1 = box1
-        x1_2, y1_2, x2_2, y2_2 = box2
+    def set_camera_pose(self, altitude: float, pitch_deg: float):
+        """Drone altitude (m) and camera pitch (deg) for ground-plane distances"""
+        self.distance_estimator.set_camera_pose(altitude, pitch_deg)
         
-        # Calculate intersection
-        x1_i = max(x1_1, x1_2)
-        y1_i = max(y1_1, y1_2)
-        x2_i = min(x2_1, x2_2)
-        y2_i = min(y2_1, y2_2)
+    def miss_budget(self, class_name: str) -> int:
+        """Frames a confirmed track of this class may go unmatched before removal"""
+        return self.max_missed_by_class.get(class_name, self.max_missed_frames)
         
-        if x2_i <= x1_i or y2_i <= y1_i:
-            return 0.0
-            
-        intersection = (x2_i - x1_i) * (y2_i - y1_i)
+    def update(self, detections: List[Detection], frame_height: int,
+               timestamp: Optional[float] = None) -> List[TrackedObject]:
+        """Update tracker with new detections; returns the confirmed tracks"""
+        timestamp = time.perf_counter() if timestamp is None else timestamp
         
-        # Calculate union
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union = area1 + area2 - intersection
+        # Predict all existing tracks
+        obj_ids = list(self.tracked_objects.keys())
+        predictions = np.array([self.tracked_objects[obj_id].kalman_filter.predict()
+                                for obj_id in obj_ids], dtype=np.float32).reshape(-1, 4)
+        det_boxes = np.array([d.bbox for d in detections], dtype=np.float32).reshape(-1, 4)
+        det_scores = np.array([d.confidence for d in detections], dtype=np.float32)
         
-        return intersection / union if union > 0 else 0.0
+        result = self.association.associate(predictions, det_boxes, det_scores,
+                                            self.iou_threshold)
         
-    def update(self, detections: List[Detection], frame_height: int) -> List[TrackedObject]:
-        """Update tracker with new detections"""
-        # Predict all existing tracks
-        predictions = {}
-        for obj_id, obj in self.tracked_objects.items():
-            predicted_bbox = obj.kalman_filter.predict()
-            predictions[obj_id] = predicted_bbox
+        # Distances only for detections that feed full tracks
+        matched = [detections[col] for _, col in result.matches]
+        distances = self.distance_estimator.estimate_distances(matched, frame_height)
+        for detection, distance in zip(matched, distances):
+            detection.distance = float(distance)
+        
+        # Update matched tracks
+        for row, col in result.matches:
+            detection = detections[col]
+            obj = self.tracked_objects[obj_ids[row]]
+            obj.kalman_filter.update(detection.bbox)
+            obj.bbox = detection.bbox
+            obj.confidence = detection.confidence
+            obj.distance = detection.distance
+            obj.age += 1
+            obj.missed_frames = 0
             
-        # Calculate cost matrix for assignment
-        if detections and self.tracked_objects:
-            cost_matrix = np.zeros((len(self.tracked_objects), len(detections)))
-            obj_ids = list(self.tracked_objects.keys())
+        # Unmatched tracks age even on frames without any detections
+        for row in result.unmatched_tracks:
+            self.tracked_objects[obj_ids[row]].missed_frames += 1
             
-            for i, obj_id in enumerate(obj_ids):
-                predicted_bbox = predictions[obj_id]
-                for j, detection in enumerate(detections):
-                    iou = self._calculate_iou(predicted_bbox, detection.bbox)
-                    cost_matrix[i, j] = 1 - iou
-                    
-            # Hungarian algorithm for optimal assignment
-            if cost_matrix.size > 0:
-                row_indices, col_indices = linear_sum_assignment(cost_matrix)
-                
-                # Update matched tracks
-                matched_detections = set()
-                matched_tracks = set()
-                
-                for row, col in zip(row_indices, col_indices):
-                    if cost_matrix[row, col] < (1 - self.iou_threshold):
-                        obj_id = obj_ids[row]
-                        detection = detections[col]
-                        
-                        # Update track
-                        obj = self.tracked_objects[obj_id]
-                        obj.kalman_filter.update(detection.bbox)
-                        obj.bbox = detection.bbox
-                        obj.confidence = detection.confidence
-                        obj.distance = detection.distance
-                        obj.age += 1
-                        obj.missed_frames = 0
-                        
-                        matched_detections.add(col)
-                        matched_tracks.add(obj_id)
-                
-                # Handle unmatched tracks
-                for obj_id in self.tracked_objects:
-                    if obj_id not in matched_tracks:
-                        self.tracked_objects[obj_id].missed_frames += 1
-                        
-                # Create new tracks for unmatched detections
-                for i, detection in enumerate(detections):
-                    if i not in matched_detections:
-                        self._create_new_track(detection, frame_height)
-        else:
-            # No existing tracks, create new ones for all detections
-            for detection in detections:
-                self._create_new_track(detection, frame_height)
+        # Leftover detections extend tentative placeholders or start new ones
+        self._update_tentative([detections[col] for col in result.new_detections],
+                               frame_height)
                 
-        # Remove old tracks
+        # Remove tracks past their class miss budget
         to_remove = []
         for obj_id, obj in self.tracked_objects.items():
-            if obj.missed_frames > self.max_missed_frames:
+            if obj.missed_frames > self.miss_budget(obj.class_name):
                 to_remove.append(obj_id)
                 
         for obj_id in to_remove:
             del self.tracked_objects[obj_id]
             
-        return list(self.tracked_objects.values())
+        for obj in self.tracked_objects.values():
+            self._record_motion(obj, timestamp)
+            
+        return self.confirmed_tracks()
         
-    def _create_new_track(self, detection: Detection, frame_height: int):
-        """Create new tracked object"""
-        obj_id = str(uuid.uuid4())[:8]
+    def _update_tentative(self, detections: List[Detection], frame_height: int):
+        """Match placeholders to unclaimed detections; promote after confirm_hits hits"""
+        for tentative in self.tentative_tracks:
+            tentative.frames_since_hit += 1
+        boxes = np.array([t.predicted_bbox() for t in self.tentative_tracks],
+                         dtype=np.float32).reshape(-1, 4)
+        det_boxes = np.array([d.bbox for d in detections], dtype=np.float32).reshape(-1, 4)
+        det_scores = np.array([d.confidence for d in detections], dtype=np.float32)
+        result = self.association.associate(boxes, det_boxes, det_scores, self.iou_threshold)
+        
+        promoted = []
+        for row, col in result.matches:
+            tentative, detection = self.tentative_tracks[row], detections[col]
+            # Per processed frame, not per detector run: with DETECTION_INTERVAL > 1
+            # this seeds the Kalman velocity, which is predicted every frame
+            steps = tentative.frames_since_hit
+            tentative.velocity = ((detection.bbox[0] - tentative.bbox[0]) / steps,
+                                  (detection.bbox[1] - tentative.bbox[1]) / steps)
+            tentative.bbox = detection.bbox
+            tentative.detection = detection
+            tentative.hits += 1
+            tentative.missed_frames = 0
+            tentative.frames_since_hit = 0
+            if tentative.hits >= self.confirm_hits:
+                promoted.append(tentative)
+        for row in result.unmatched_tracks:
+            self.tentative_tracks[row].missed_frames += 1
+            
+        # Brand-new detections; with confirm_hits <= 1 they are confirmed at once
+        for col in result.new_detections:
+            tentative = TentativeTrack(detections[col].bbox, (0.0, 0.0), detections[col])
+            if self.confirm_hits <= 1:
+                promoted.append(tentative)
+            else:
+                self.tentative_tracks.append(tentative)
+                
+        self.tentative_tracks = [t for t in self.tentative_tracks
+                                 if t.hits < self.confirm_hits
+                                 and t.missed_frames <= self.tentative_max_missed]
+        
+        if promoted:
+            seeds = [t.detection for t in promoted]
+            distances = self.distance_estimator.estimate_distances(seeds, frame_height)
+            for tentative, distance in zip(promoted, distances):
+                tentative.detection.distance = float(distance)
+                self._create_new_track(tentative.detection, frame_height, tentative.velocity)
+                
+    def confirmed_tracks(self) -> List[TrackedObject]:
+        """Tracks for rendering and alerts; updates each track's lifecycle state"""
+        confirmed = []
+        for obj in self.tracked_objects.values():
+            if obj.missed_frames <= self.coast_frames:
+                obj.state = TrackState.CONFIRMED
+                confirmed.append(obj)
+            else:
+                obj.state = TrackState.LOST
+        return confirmed
         
-        # Enhanced distance estimation
-        bbox_width = detection.bbox[2] - detection.bbox[0]
-        bbox_height = detection.bbox[3] - detection.bbox[1]
+    def track_boxes(self) -> Dict[str, Tuple[float, float, float, float]]:
+        """Latest box of every track by id"""
+        return {obj_id: obj.bbox for obj_id, obj in self.tracked_objects.items()}
         
-        distance_by_size = self.distance_estimator.estimate_distance_by_size(
-            bbox_width, bbox_height, detection.class_name)
-        distance_by_position = self.distance_estimator.estimate_distance_by_position(
-            detection.bbox, frame_height)
+    def apply_camera_motion(self, affine: Optional[np.ndarray]):
+        """Compensate all tracks for camera ego-motion before the next prediction"""
+        if affine is None:
+            return
+        for obj in self.tracked_objects.values():
+            obj.kalman_filter.apply_camera_motion(affine)
+            obj.bbox = transform_box(obj.bbox, affine)
+        for tentative in self.tentative_tracks:
+            tentative.bbox = transform_box(tentative.bbox, affine)
             
-        # Weighted average of distance estimates
-        if distance_by_size > 0:
-            final_distance = 0.7 * distance_by_size + 0.3 * distance_by_position
-        else:
-            final_distance = distance_by_position
+    def propagate(self, boxes: Dict[str, Tuple[float, float, float, float]], frame_height: int,
+                  timestamp: Optional[float] = None) -> List[TrackedObject]:
+        """Advance tracks on a frame without detections
+        
+        Tracks with a propagated (e.g. optical-flow) box are corrected with it,
+        the rest coast on the Kalman prediction. Nothing counts as missed.
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        objects = list(self.tracked_objects.values())
+        for tentative in self.tentative_tracks:
+            tentative.frames_since_hit += 1
+        
+        for obj in objects:
+            predicted = obj.kalman_filter.predict()
+            bbox = boxes.get(obj.id)
+            if bbox is None:
+                obj.bbox = predicted
+            else:
+                obj.kalman_filter.update(bbox)
+                obj.bbox = bbox
+                
+        if objects:
+            distances = self.distance_estimator.estimate_box_distances(
+                np.array([obj.bbox for obj in objects], dtype=np.float32),
+                [obj.class_name for obj in objects], frame_height)
+            for obj, distance in zip(objects, distances):
+                obj.distance = float(distance)
+                
+        for obj in objects:
+            self._record_motion(obj, timestamp)
             
+        return self.confirmed_tracks()
+        
+    def step(self, detections: List[Detection], frame_height: int, timestamp: float,
+             detector_ran: bool = True, camera_motion: Optional[np.ndarray] = None,
+             flow_boxes: Optional[Dict[str, Tuple[float, float, float, float]]] = None
+             ) -> List[TrackedObject]:
+        """One processed frame: camera compensation, then update or propagation
+        
+        Live processing and log replay both go through here, so the same
+        inputs give the same tracks.
+        """
+        self.apply_camera_motion(camera_motion)
+        if detector_ran:
+            return self.update(detections, frame_height, timestamp)
+        return self.propagate(flow_boxes or {}, frame_height, timestamp)
+        
+    def _record_motion(self, obj: TrackedObject, timestamp: float):
+        """Derive velocity/acceleration from the Kalman state and append to the trajectory"""
+        cx, cy, w, h, vx, vy = obj.kalman_filter.kalman.statePost.ravel()[:6]
+        prev_vx, prev_vy = obj.velocity
+        obj.velocity = (float(vx), float(vy))
+        obj.acceleration = (float(vx - prev_vx), float(vy - prev_vy))
+        obj.trajectory.append(timestamp, cx, cy, w, h, obj.distance)
+        
+    def last_positions(self, track_id: str, n: int) -> np.ndarray:
+        """Last n centers (oldest first) of a track as an (n, 2) array"""
+        obj = self.tracked_objects.get(track_id)
+        if obj is None:
+            return np.zeros((0, 2), dtype=np.float64)
+        return obj.trajectory.last(n)[:, 1:3]
+        
+    def _current_centers(self) -> Tuple[List[TrackedObject], np.ndarray]:
+        """Confirmed tracks and their latest filtered centers (lost tracks excluded)"""
+        objects = [obj for obj in self.tracked_objects.values()
+                   if obj.state == TrackState.CONFIRMED]
+        centers = np.array([obj.kalman_filter.kalman.statePost.ravel()[:2] for obj in objects],
+                           dtype=np.float64).reshape(len(objects), 2)
+        return objects, centers
+        
+    def tracks_in_region(self, region: Tuple[float, float, float, float]) -> List[TrackedObject]:
+        """Confirmed tracks whose center lies inside an (x1, y1, x2, y2) region"""
+        objects, centers = self._current_centers()
+        x1, y1, x2, y2 = region
+        inside = ((centers[:, 0] >= x1) & (centers[:, 0] <= x2)
+                  & (centers[:, 1] >= y1) & (centers[:, 1] <= y2))
+        return [obj for obj, keep in zip(objects, inside) if keep]
+        
+    def tracks_approaching_center(self, frame_width: int, frame_height: int,
+                                  min_speed: float = 0.5) -> List[TrackedObject]:
+        """Confirmed tracks moving toward the frame center faster than min_speed pixels/frame"""
+        objects, centers = self._current_centers()
+        velocities = np.array([obj.velocity for obj in objects],
+                              dtype=np.float64).reshape(len(objects), 2)
+        to_center = np.array([frame_width / 2, frame_height / 2]) - centers
+        
+        # Speed component along the direction to the center
+        norms = np.linalg.norm(to_center, axis=1)
+        norms[norms == 0] = 1.0
+        closing_speed = np.einsum('ij,ij->i', velocities, to_center) / norms
+        return [obj for obj, keep in zip(objects, closing_speed > min_speed) if keep]
+        
+    def _create_new_track(self, detection: Detection, frame_height: int,
+                          velocity: Tuple[float, float] = (0.0, 0.0)):
+        """Create new tracked object (velocity seeds the Kalman state)"""
+        obj_id = str(uuid.uuid4())[:8]
+        
         tracked_obj = TrackedObject(
             id=obj_id,
             bbox=detection.bbox,
             confidence=detection.confidence,
             class_name=detection.class_name,
-            distance=final_distance,
+            distance=detection.distance,
             velocity=(0.0, 0.0),
             age=0,
             missed_frames=0,
-            kalman_filter=KalmanTracker(detection.bbox)
+            kalman_filter=KalmanTracker(detection.bbox, velocity),
+            acceleration=(0.0, 0.0),
+            trajectory=TrajectoryBuffer(self.config.TRAJECTORY_CAPACITY)
         )
         
         self.tracked_objects[obj_id] = tracked_obj 
\ No newline at end of file
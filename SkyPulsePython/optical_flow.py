@@ -0,0 +1,143 @@
+"""
+Sparse Optical Flow
+Pyramidal Lucas-Kanade on a downscaled grayscale frame: propagates track
+boxes between detector runs and estimates global camera motion
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import Config
+
+Box = Tuple[float, float, float, float]
+
+@dataclass
+class FlowResult:
+    camera_motion: Optional[np.ndarray] = None  # 2x3 affine, previous -> current frame
+    boxes: Dict[str, Box] = field(default_factory=dict)  # propagated boxes by track id
+
+class FlowPropagator:
+    """Tracks a few corners per box plus background corners from frame to frame"""
+
+    def __init__(self):
+        self.config = Config()
+        self.scale = self.config.FLOW_SCALE
+        self.lk_params = dict(
+            winSize=(self.config.FLOW_WIN_SIZE, self.config.FLOW_WIN_SIZE),
+            maxLevel=self.config.FLOW_PYRAMID_LEVELS,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)
+        )
+        self.prev_gray: Optional[np.ndarray] = None
+
+    def reset(self):
+        self.prev_gray = None
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale,
+                           interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def _box_corners(self, gray: np.ndarray, box: Box) -> Optional[np.ndarray]:
+        """Corners inside a (full-resolution) box, in downscaled coordinates"""
+        h, w = gray.shape
+        x1, y1 = int(max(box[0] * self.scale, 0)), int(max(box[1] * self.scale, 0))
+        x2, y2 = int(min(box[2] * self.scale, w)), int(min(box[3] * self.scale, h))
+        if x2 - x1 < 4 or y2 - y1 < 4:
+            return None
+        corners = cv2.goodFeaturesToTrack(gray[y1:y2, x1:x2],
+                                          self.config.FLOW_MAX_TRACK_CORNERS, 0.01, 2)
+        if corners is None:
+            return None
+        return corners.reshape(-1, 2) + (x1, y1)
+
+    def update(self, frame: np.ndarray, boxes: Dict[str, Box],
+               propagate: bool = True) -> FlowResult:
+        """Flow from the previous frame to this one
+
+        boxes are the tracks' positions in the previous frame; they are masked
+        out of the camera-motion estimate and, if propagate is set, moved to
+        this frame.
+        """
+        gray = self._prepare(frame)
+        prev_gray, self.prev_gray = self.prev_gray, gray
+        if prev_gray is None or prev_gray.shape != gray.shape:
+            return FlowResult()
+
+        # Background corners (moving objects must not vote on camera motion)
+        mask = np.full(gray.shape, 255, dtype=np.uint8)
+        for x1, y1, x2, y2 in boxes.values():
+            mask[int(max(y1 * self.scale, 0)):int(y2 * self.scale) + 1,
+                 int(max(x1 * self.scale, 0)):int(x2 * self.scale) + 1] = 0
+        background = cv2.goodFeaturesToTrack(prev_gray, self.config.FLOW_MAX_GLOBAL_CORNERS,
+                                             0.01, 8, mask=mask)
+        point_sets = [np.zeros((0, 2), np.float32) if background is None
+                      else background.reshape(-1, 2)]
+        track_ids = []
+        if propagate:
+            for track_id, box in boxes.items():
+                corners = self._box_corners(prev_gray, box)
+                if corners is not None:
+                    point_sets.append(corners)
+                    track_ids.append(track_id)
+
+        # One LK call for all points
+        p0 = np.concatenate(point_sets).astype(np.float32)
+        if len(p0) == 0:
+            return FlowResult()
+        p1, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, p0.reshape(-1, 1, 2), None,
+                                                 **self.lk_params)
+        p1 = p1.reshape(-1, 2)
+        good = status.ravel() == 1
+
+        result = FlowResult()
+        n_background = len(point_sets[0])
+        bg_good = good[:n_background]
+        if bg_good.sum() >= self.config.FLOW_MIN_POINTS:
+            affine, _ = cv2.estimateAffinePartial2D(p0[:n_background][bg_good],
+                                                    p1[:n_background][bg_good],
+                                                    method=cv2.RANSAC,
+                                                    ransacReprojThreshold=1.0)
+            if affine is not None:
+                affine[:, 2] /= self.scale  # translation back to full resolution
+                result.camera_motion = affine
+
+        start = n_background
+        for track_id, points in zip(track_ids, point_sets[1:]):
+            end = start + len(points)
+            ok = good[start:end]
+            if ok.sum() >= self.config.FLOW_MIN_POINTS:
+                result.boxes[track_id] = self._move_box(boxes[track_id],
+                                                        p0[start:end][ok], p1[start:end][ok])
+            start = end
+
+        # Boxes without enough texture follow the camera
+        if propagate and result.camera_motion is not None:
+            for track_id, box in boxes.items():
+                if track_id not in result.boxes:
+                    result.boxes[track_id] = transform_box(box, result.camera_motion)
+        return result
+
+    def _move_box(self, box: Box, p0: np.ndarray, p1: np.ndarray) -> Box:
+        """Shift by the median displacement, scale by the median spread ratio"""
+        dx, dy = np.median(p1 - p0, axis=0) / self.scale
+        spread0 = np.linalg.norm(p0 - p0.mean(axis=0), axis=1)
+        spread1 = np.linalg.norm(p1 - p1.mean(axis=0), axis=1)
+        valid = spread0 > 1.0
+        scale = float(np.median(spread1[valid] / spread0[valid])) if valid.any() else 1.0
+        scale = float(np.clip(scale, 0.8, 1.25))
+
+        x1, y1, x2, y2 = box
+        cx, cy = (x1 + x2) / 2 + dx, (y1 + y2) / 2 + dy
+        w, h = (x2 - x1) * scale, (y2 - y1) * scale
+        return (float(cx - w / 2), float(cy - h / 2), float(cx + w / 2), float(cy + h / 2))
+
+def transform_box(box: Box, affine: np.ndarray) -> Box:
+    """Apply a similarity transform to a box's center and size"""
+    x1, y1, x2, y2 = box
+    cx, cy = affine @ np.array([(x1 + x2) / 2, (y1 + y2) / 2, 1.0])
+    scale = float(np.sqrt(abs(np.linalg.det(affine[:, :2]))))
+    w, h = (x2 - x1) * scale, (y2 - y1) * scale
+    return (float(cx - w / 2), float(cy - h / 2), float(cx + w / 2), float(cy + h / 2))
@@ -9,11 +9,15 @@ import gc
 import cv2
 import numpy as np
 from typing import Optional, Tuple
-from config import Config
+from buffer_pool import BufferPool
+from config import Config, RuntimeConfig
 
 class PerformanceOptimizer:
-    def __init__(self):
+    def __init__(self, runtime_config: Optional[RuntimeConfig] = None,
+                 buffer_pool: Optional[BufferPool] = None):
         self.config = Config()
+        self.runtime_config = runtime_config or RuntimeConfig()
+        self.buffer_pool = buffer_pool
         self._setup_gpu_optimization()
         self._setup_opencv_optimization()
         
@@ -48,7 +52,7 @@ class PerformanceOptimizer:
             pass
             
     def optimize_model(self, model):
-        """Optimize YOLO model for inference"""
+        """Optimize YOLO model for inference (uncached path: compiles in-process)"""
         model.to(self.config.DEVICE)
         
         if self.config.HALF_PRECISION and self.config.DEVICE == "cuda":
@@ -63,28 +67,47 @@ class PerformanceOptimizer:
         # Set model to evaluation mode
         model.eval()
         
-        # Warm up the model
-        dummy_input = torch.randn(1, 3, self.config.MODEL_INPUT_SIZE, 
-                                 self.config.MODEL_INPUT_SIZE).to(self.config.DEVICE)
-        if self.config.HALF_PRECISION:
-            dummy_input = dummy_input.half()
-            
+        self.warmup_model(model)
+        return model
+        
+    def warmup_model(self, model, iterations: Optional[int] = None):
+        """Run dummy inferences through the same predict path as live frames"""
+        iterations = self.config.WARMUP_ITERATIONS if iterations is None else iterations
+        size = self.config.MODEL_INPUT_SIZE
+        dummy_frame = np.zeros((size, size, 3), dtype=np.uint8)
+        
         with torch.no_grad():
-            for _ in range(3):
-                _ = model(dummy_input)
+            for _ in range(iterations):
+                model(dummy_frame, imgsz=size, device=self.config.DEVICE,
+                      half=self.use_half_precision, verbose=False)
                 
-        torch.cuda.synchronize()
-        return model
+        if torch.cuda.is_available() and self.config.DEVICE.startswith("cuda"):
+            torch.cuda.synchronize()
+            
+    @property
+    def use_half_precision(self) -> bool:
+        """FP16 is only supported on CUDA devices"""
+        return self.config.HALF_PRECISION and self.config.DEVICE.startswith("cuda")
         
     def optimize_frame(self, frame: np.ndarray) -> np.ndarray:
         """Optimize frame preprocessing"""
-        # Resize frame for processing
-        if frame.shape[:2] != (self.config.RESIZE_HEIGHT, self.config.RESIZE_WIDTH):
-            frame = cv2.resize(frame, (self.config.RESIZE_WIDTH, self.config.RESIZE_HEIGHT),
-                             interpolation=cv2.INTER_LINEAR)
+        # Resize frame for processing (resolution may be lowered by the QoS controller);
+        # one snapshot so a concurrent change never yields a mixed width/height
+        settings = self.runtime_config.snapshot()
+        width, height = settings['RESIZE_WIDTH'], settings['RESIZE_HEIGHT']
+        if frame.shape[:2] != (height, width):
+            dst = None
+            if self.buffer_pool is not None:
+                dst = self.buffer_pool.acquire((height, width) + frame.shape[2:], frame.dtype)
+            frame = cv2.resize(frame, (width, height), dst=dst, interpolation=cv2.INTER_LINEAR)
         
         return frame
         
+    def release_frame(self, frame: np.ndarray, optimized_frame: np.ndarray):
+        """Return optimize_frame's output to the pool once inference is done"""
+        if self.buffer_pool is not None and optimized_frame is not frame:
+            self.buffer_pool.release(optimized_frame)
+        
     def cleanup_memory(self):
         """Clean up GPU memory"""
         if torch.cuda.is_available():
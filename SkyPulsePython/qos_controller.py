@@ -0,0 +1,107 @@
+"""
+Closed-Loop QoS Controller
+Steps model input size and preprocessing resolution to hold the target FPS
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from config import Config, RuntimeConfig
+
+@dataclass
+class QoSEvent:
+    timestamp: float
+    old_level: int
+    new_level: int
+    reason: str  # "overload" or "headroom"
+    latency_ms: float  # smoothed stage latency that triggered the change
+    budget_ms: float
+    settings: dict = field(default_factory=dict)
+
+class QoSController:
+    """Hysteresis controller driving RuntimeConfig from measured stage latency"""
+
+    def __init__(self, runtime_config: RuntimeConfig,
+                 levels: Optional[List[Tuple[int, int, int]]] = None):
+        self.config = Config()
+        self.runtime_config = runtime_config
+
+        # Level 0 is the configured (possibly host-tuned) operating point, so
+        # recovering from overload returns to where the system started; lower
+        # levels never step above it
+        levels = levels or self.config.QOS_LEVELS
+        start = (runtime_config.get('MODEL_INPUT_SIZE'), runtime_config.get('RESIZE_WIDTH'),
+                 runtime_config.get('RESIZE_HEIGHT'))
+        self.levels = [start] + [level for level in levels if level != start
+                                 and all(value <= limit for value, limit in zip(level, start))]
+        self.budget = 1.0 / self.config.TARGET_FPS
+
+        self.level = 0
+        self.smoothed_latency = 0.0
+        self.slow_frames = 0
+        self.fast_frames = 0
+        self.cooldown = 0
+
+        self.listeners: List[Callable[[QoSEvent], None]] = []
+        self.events = deque(maxlen=100)
+
+    def add_listener(self, callback: Callable[[QoSEvent], None]):
+        """Register a callback invoked on every level change"""
+        self.listeners.append(callback)
+
+    def observe(self, stage_latency: float) -> Optional[QoSEvent]:
+        """Feed one frame's measured latency (seconds); returns an event on change"""
+        if self.smoothed_latency == 0.0:
+            self.smoothed_latency = stage_latency
+        else:
+            self.smoothed_latency = self.smoothed_latency * 0.8 + stage_latency * 0.2
+
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return None
+
+        if self.smoothed_latency > self.budget * self.config.QOS_DOWNGRADE_RATIO:
+            self.slow_frames += 1
+            self.fast_frames = 0
+        elif self.smoothed_latency < self.budget * self.config.QOS_UPGRADE_RATIO:
+            self.fast_frames += 1
+            self.slow_frames = 0
+        else:
+            self.slow_frames = 0
+            self.fast_frames = 0
+
+        if (self.slow_frames >= self.config.QOS_DOWNGRADE_FRAMES
+                and self.level < len(self.levels) - 1):
+            return self._set_level(self.level + 1, "overload")
+        if self.fast_frames >= self.config.QOS_UPGRADE_FRAMES and self.level > 0:
+            return self._set_level(self.level - 1, "headroom")
+        return None
+
+    def _set_level(self, new_level: int, reason: str) -> QoSEvent:
+        """Apply a level to the runtime config and notify listeners"""
+        input_size, width, height = self.levels[new_level]
+        settings = {'MODEL_INPUT_SIZE': input_size, 'RESIZE_WIDTH': width,
+                    'RESIZE_HEIGHT': height}
+        self.runtime_config.update(**settings)
+
+        event = QoSEvent(
+            timestamp=time.time(),
+            old_level=self.level,
+            new_level=new_level,
+            reason=reason,
+            latency_ms=self.smoothed_latency * 1000,
+            budget_ms=self.budget * 1000,
+            settings=settings
+        )
+
+        self.level = new_level
+        self.slow_frames = 0
+        self.fast_frames = 0
+        self.cooldown = self.config.QOS_COOLDOWN_FRAMES
+
+        self.events.append(event)
+        for callback in self.listeners:
+            callback(event)
+        return event
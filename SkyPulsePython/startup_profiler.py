@@ -0,0 +1,47 @@
+"""
+Startup Profiler
+Phase-by-phase timing of process startup up to the first detection
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Tuple
+
+class StartupProfiler:
+    """Records named startup phases and milestones relative to process start"""
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.milestones: List[Tuple[str, float]] = []
+
+    def reset(self):
+        """Restart the clock, e.g. after waiting for user confirmation"""
+        self.start_time = time.perf_counter()
+        self.phases.clear()
+        self.milestones.clear()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of startup work"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def mark(self, name: str) -> float:
+        """Record a milestone; returns seconds since process start"""
+        elapsed = time.perf_counter() - self.start_time
+        self.milestones.append((name, elapsed))
+        return elapsed
+
+    def report(self, log: Callable[[str], None] = print):
+        """Emit one line per phase and milestone"""
+        for name, duration in self.phases:
+            log(f"Startup phase {name}: {duration * 1000:.0f}ms")
+        for name, elapsed in self.milestones:
+            log(f"Startup milestone {name}: {elapsed:.2f}s after start")
+
+# Shared by the launcher and the vision system so phases accumulate in one place
+startup_profiler = StartupProfiler()
@@ -0,0 +1,273 @@
+"""
+Annotated Video Distribution Server
+Encodes each rendered frame once and fans it out to MJPEG/WebSocket viewers
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import Config
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MJPEG_BOUNDARY = "skypulseframe"
+
+class FrameDistributionServer:
+    """asyncio HTTP server: /stream.mjpg (MJPEG), /ws (WebSocket, binary JPEG), /stats (JSON)
+
+    The pipeline calls publish() with every rendered frame. A single encoder
+    thread JPEG-encodes the newest frame once; every client is sent whatever
+    frame is newest when it is ready, so slow viewers skip frames instead of
+    queueing them.
+    """
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None,
+                 jpeg_quality: Optional[int] = None):
+        self.config = Config()
+        self.host = host or self.config.STREAM_HOST
+        self.port = self.config.STREAM_PORT if port is None else port
+        self.jpeg_quality = jpeg_quality or self.config.STREAM_JPEG_QUALITY
+
+        # Latest-wins handoff from the pipeline to the encoder thread
+        self._pending: Optional[np.ndarray] = None
+        self._pending_release: Optional[Callable[[np.ndarray], None]] = None
+        self._pending_lock = threading.Lock()
+        self._frame_ready = threading.Event()
+
+        # Latest encoded frame shared by all clients
+        self._jpeg: bytes = b''
+        self._sequence = 0
+        self._new_frame: Optional[asyncio.Event] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._started = threading.Event()
+        self._running = False
+        self._loop_thread: Optional[threading.Thread] = None
+        self._encoder_thread: Optional[threading.Thread] = None
+
+        # Metrics
+        self.subscribers = 0
+        self.published_frames = 0
+        self.encoded_frames = 0
+        self.encode_time_total = 0.0
+        self.sent_frames = 0
+        self.skipped_frames = 0
+
+    def start(self):
+        """Start the event loop and encoder threads; returns once listening"""
+        self._running = True
+        self._loop_thread = threading.Thread(target=self._run_loop, name="StreamServerLoop",
+                                             daemon=True)
+        self._loop_thread.start()
+        self._started.wait()
+
+        self._encoder_thread = threading.Thread(target=self._encoder_worker,
+                                                name="StreamEncoder", daemon=True)
+        self._encoder_thread.start()
+
+    def stop(self):
+        """Close all connections and stop worker threads"""
+        self._running = False
+        self._frame_ready.set()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        for thread in (self._encoder_thread, self._loop_thread):
+            if thread is not None:
+                thread.join(timeout=2.0)
+
+    def publish(self, frame: np.ndarray,
+                release: Optional[Callable[[np.ndarray], None]] = None):
+        """Offer a rendered frame; never blocks (the caller must not modify it afterwards)
+
+        release, if given, is called with the frame once the server is done
+        with it (encoded, superseded by a newer frame, or nobody watching).
+        """
+        self.published_frames += 1
+        if self.subscribers == 0:
+            if release is not None:
+                release(frame)
+            return
+        with self._pending_lock:
+            dropped, dropped_release = self._pending, self._pending_release
+            self._pending, self._pending_release = frame, release
+        if dropped is not None and dropped_release is not None:
+            dropped_release(dropped)
+        self._frame_ready.set()
+
+    def stats(self) -> dict:
+        """Encode and fan-out metrics"""
+        encoded = max(self.encoded_frames, 1)
+        return {
+            'subscribers': self.subscribers,
+            'published_frames': self.published_frames,
+            'encoded_frames': self.encoded_frames,
+            'avg_encode_ms': self.encode_time_total / encoded * 1000,
+            'sent_frames': self.sent_frames,
+            'skipped_frames': self.skipped_frames,
+        }
+
+    def _encoder_worker(self):
+        """Encode the newest pending frame exactly once and wake all clients"""
+        encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        while self._running:
+            self._frame_ready.wait()
+            self._frame_ready.clear()
+            with self._pending_lock:
+                frame, self._pending = self._pending, None
+                release, self._pending_release = self._pending_release, None
+            if frame is None:
+                continue
+
+            start = time.perf_counter()
+            ok, buffer = cv2.imencode('.jpg', frame, encode_params)
+            self.encode_time_total += time.perf_counter() - start
+            if release is not None:
+                release(frame)
+            if not ok:
+                continue
+            self.encoded_frames += 1
+            self._loop.call_soon_threadsafe(self._announce_frame, buffer.tobytes())
+
+    def _announce_frame(self, jpeg: bytes):
+        """Swap in the new frame and wake waiting clients (event loop thread)"""
+        self._jpeg = jpeg
+        self._sequence += 1
+        event, self._new_frame = self._new_frame, asyncio.Event()
+        event.set()
+
+    async def _next_frame(self, last_sequence: int) -> Tuple[int, bytes]:
+        """Wait for a frame newer than last_sequence and return the newest one"""
+        while self._sequence == last_sequence:
+            await self._new_frame.wait()
+        return self._sequence, self._jpeg
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._new_frame = asyncio.Event()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_client, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            for task in asyncio.all_tasks(self._loop):
+                task.cancel()
+            self._loop.run_until_complete(asyncio.sleep(0))
+            self._loop.close()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+            lines = request.decode('latin-1').split('\r\n')
+            path = lines[0].split(' ')[1] if len(lines[0].split(' ')) > 1 else '/'
+            headers = {}
+            for line in lines[1:]:
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            if path.startswith('/ws') and headers.get('upgrade', '').lower() == 'websocket':
+                await self._serve_websocket(reader, writer, headers)
+            elif path.startswith('/stream.mjpg'):
+                await self._serve_mjpeg(writer)
+            elif path.startswith('/stats'):
+                body = json.dumps(self.stats()).encode()
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Access-Control-Allow-Origin: *\r\n'
+                             + f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+                await writer.drain()
+            else:
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n')
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream_frames(self, writer: asyncio.StreamWriter, frame_to_bytes):
+        """Send the newest frame whenever the client has drained the previous one"""
+        self.subscribers += 1
+        last_sequence = self._sequence
+        try:
+            while self._running:
+                sequence, jpeg = await self._next_frame(last_sequence)
+                self.skipped_frames += max(sequence - last_sequence - 1, 0)
+                last_sequence = sequence
+                writer.write(frame_to_bytes(jpeg))
+                await writer.drain()
+                self.sent_frames += 1
+        finally:
+            self.subscribers -= 1
+
+    async def _serve_mjpeg(self, writer: asyncio.StreamWriter):
+        writer.write(b'HTTP/1.1 200 OK\r\nCache-Control: no-cache\r\n'
+                     b'Access-Control-Allow-Origin: *\r\n'
+                     + f'Content-Type: multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}\r\n\r\n'
+                     .encode())
+        await writer.drain()
+
+        def mjpeg_part(jpeg: bytes) -> bytes:
+            return (f'--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                    f'Content-Length: {len(jpeg)}\r\n\r\n'.encode() + jpeg + b'\r\n')
+
+        await self._stream_frames(writer, mjpeg_part)
+
+    async def _serve_websocket(self, reader: asyncio.StreamReader,
+                               writer: asyncio.StreamWriter, headers: dict):
+        key = headers.get('sec-websocket-key', '')
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest())
+        writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n'
+                     b'Connection: Upgrade\r\nSec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+        await writer.drain()
+
+        def websocket_frame(jpeg: bytes) -> bytes:
+            length = len(jpeg)
+            if length < 126:
+                header = struct.pack('!BB', 0x82, length)
+            elif length < 65536:
+                header = struct.pack('!BBH', 0x82, 126, length)
+            else:
+                header = struct.pack('!BBQ', 0x82, 127, length)
+            return header + jpeg
+
+        # Client messages are ignored; EOF or a close frame ends the stream
+        sender = asyncio.ensure_future(self._stream_frames(writer, websocket_frame))
+        receiver = asyncio.ensure_future(self._read_until_close(reader))
+        try:
+            await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Cancel whichever side is still running and retrieve both results,
+            # so no task exception goes unretrieved
+            for task in (sender, receiver):
+                task.cancel()
+            await asyncio.gather(sender, receiver, return_exceptions=True)
+
+    async def _read_until_close(self, reader: asyncio.StreamReader):
+        """Discard incoming WebSocket frames until a close frame or EOF"""
+        try:
+            while True:
+                first, second = await reader.readexactly(2)
+                length = second & 0x7F
+                if length == 126:
+                    length = struct.unpack('!H', await reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack('!Q', await reader.readexactly(8))[0]
+                masked = second & 0x80
+                await reader.readexactly(length + (4 if masked else 0))
+                if first & 0x0F == 0x8:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            return  # viewer went away without a close frame